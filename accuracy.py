@@ -1,189 +1,224 @@
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+"""
+Offline evaluation of the recommender on a time-based split of the interaction tables.
+
+The model is trained on every interaction before a cutoff time and asked to recommend
+for the users who interacted after it; a recommended post counts as a hit when the user
+interacted with it after the cutoff without having done so before. Reports precision@k,
+recall@k, NDCG@k and catalog coverage. Users are scored in fixed-size chunks spread
+over a process pool, each chunk with its own seeded RNG, so a run with a given --seed
+gives the same numbers with any number of workers.
+
+The hybrid strategy scores the feed as it is served, and Recommender.mix shuffles that
+feed, so its order carries no ranking: NDCG@k is only reported for the ranked
+strategies (collaborative and content), while hybrid gets precision, recall and
+coverage of the served posts.
+
+    python accuracy.py --k 10 --test-fraction 0.2 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
-
-# Load data from CSV files into pandas DataFrames
-viewed_posts = pd.read_csv('viewed_posts.csv')  # Posts viewed by users
-liked_posts = pd.read_csv('liked_posts.csv')  # Posts liked by users
-rated_posts = pd.read_csv('rated_posts.csv')  # Posts rated by users
-inspired_posts = pd.read_csv('inspired_posts.csv')  # Posts users were inspired by
-users_data = pd.read_csv('cleaned_users_data.csv')  # User information
-posts_summary = pd.read_csv('cleaned_summary_posts.csv')  # Summary information for posts
-
-# Define a Recommender class to generate recommendations
-class Recommender:
-    def __init__(self, posts_summary, rated_posts):
-        self.posts_summary = posts_summary  # Summary of posts
-        self.rated_posts = rated_posts  # Ratings data for posts
-        self.svd_model = None  # Placeholder for the SVD model
-        self.create_svd_model()  # Create the SVD model upon initialization
-
-    def create_svd_model(self):
-        """Create an SVD model using ratings data for collaborative filtering"""
-        # Create a pivot table where rows are users, columns are posts, and values are ratings
-        ratings_matrix = self.rated_posts.pivot_table(
-            index='User ID', columns='Post ID', values='Rating Percent', aggfunc="mean"
-        ).fillna(0)  # Fill missing values with 0
-
-        # Perform Truncated SVD on the ratings matrix for dimensionality reduction
-        svd = TruncatedSVD(n_components=20)  # Reduce to 20 components
-        self.svd_model = svd.fit_transform(ratings_matrix)  # Fit SVD and transform the data
-        self.svd_matrix = pd.DataFrame(self.svd_model, index=ratings_matrix.index)  # Store transformed data
-
-    def content_based(self, user_posts):
-        """Content-based recommendation with added diversity in categories or tags"""
-        if not user_posts:  # Return an empty list if no posts are provided
-            return []
-
-        # Identify unique categories for the user's posts
-        categories = self.posts_summary[
-            self.posts_summary['Post ID'].isin(user_posts)
-        ]['category_name'].unique()
-
-        # Recommend posts within the same categories
-        recommended = self.posts_summary[
-            self.posts_summary['category_name'].isin(categories)
-        ]
-
-        # Return a random sample of up to 10 recommended posts
-        sample_size = min(10, len(recommended))  # Ensure sample size does not exceed the number of available posts
-        return recommended['Post ID'].sample(n=sample_size).tolist()
-
-    def collaborative(self, user_id):
-        """Collaborative filtering recommendations using SVD"""
-        if self.svd_model is None:  # Check if the SVD model exists
-            return []
-
-        # Recreate the ratings matrix
-        ratings_matrix = self.rated_posts.pivot_table(
-            index='User ID', columns='Post ID', values='Rating Percent', aggfunc="mean"
-        ).fillna(0)
-
-        if user_id not in ratings_matrix.index:  # If the user has no ratings, return an empty list
-            return []
-
-        # Get the index of the user in the ratings matrix
-        user_idx = ratings_matrix.index.get_loc(user_id)
-        user_vector = self.svd_matrix.iloc[user_idx]  # Get the user's SVD vector
-
-        # Calculate cosine similarity between the user and all others
-        user_similarity = cosine_similarity([user_vector], self.svd_matrix)[0]
-        similar_users = ratings_matrix.index[
-            np.argsort(user_similarity)[::-1]
-        ][1:5]  # Get top 4 similar users (excluding the user)
-
-        # Get posts rated by similar users
-        recommendations = self.rated_posts[
-            self.rated_posts['User ID'].isin(similar_users)
-        ]['Post ID']
-
-        # Return the top 5 most frequently recommended posts
-        return recommendations.value_counts().head(5).index.tolist()
-
-    def hybrid_recommendations(self, user_id, user_posts, mood, category_id):
-        """Generate hybrid recommendations combining content-based, collaborative, and cold-start"""
-        recommendations = []
-
-        # Add content-based recommendations
-        recommendations += self.content_based(user_posts)
-
-        # Add collaborative filtering recommendations
-        recommendations += self.collaborative(user_id)
-
-        # Add mood-based recommendations if mood is provided
-        if mood:
-            recommendations += self.cold_start(mood)
-
-        # Add recommendations based on category if category_id is provided
-        if category_id:
-            recommendations += self.posts_summary[
-                self.posts_summary['category_id'] == int(category_id)
-            ]['Post ID'].head(10).tolist()
-
-        # If fewer than 10 recommendations, fill with random posts
-        if len(recommendations) < 10:
-            recommendations += np.random.choice(
-                self.posts_summary['Post ID'], 10 - len(recommendations), replace=True
-            ).tolist()
-
-        # Return a set of 10 unique recommendations
-        return list(set(np.random.choice(recommendations, 10, replace=False)))
-
-    def cold_start(self, mood):
-        """Cold-start recommendation based on mood (this is a placeholder implementation)"""
-        if mood == 'happy':  # Recommend 'Happy' category posts for happy mood
-            return self.posts_summary[
-                self.posts_summary['category_name'] == 'Happy'
-            ]['Post ID'].head(5).tolist()
-        elif mood == 'sad':  # Recommend 'Sad' category posts for sad mood
-            return self.posts_summary[
-                self.posts_summary['category_name'] == 'Sad'
-            ]['Post ID'].head(5).tolist()
-        return []
-
-    def evaluate_recommendations(self, user_id, user_interactions, recommended_posts):
-        """Evaluate recommendations using MAE and RMSE"""
-        # Actual user interactions
-        actual_interactions = set(user_interactions)
-
-        # Predicted interactions from recommendations
-        predicted_interactions = set(recommended_posts)
-
-        # Intersection of actual and predicted interactions
-        common = actual_interactions.intersection(predicted_interactions)
-
-        # Assign binary ratings: 1 if interacted, 0 if not
-        actual_ratings = [1 if post in common else 0 for post in recommended_posts]
-        predicted_ratings = [1 if post in actual_interactions else 0 for post in recommended_posts]
-
-        # Calculate Mean Absolute Error (MAE) and Root Mean Squared Error (RMSE)
-        mae = mean_absolute_error(actual_ratings, predicted_ratings)
-        rmse = np.sqrt(mean_squared_error(actual_ratings, predicted_ratings))
-
-        return mae, rmse
-
-
-# Instantiate the recommender system
-recommender = Recommender(posts_summary, rated_posts)
-
-# Evaluate recommendations for all users
-all_user_ids = users_data['User ID'].unique()  # Get all unique user IDs
-evaluation_results = []
-
-for user_id in all_user_ids:
-    # Gather user interactions (viewed, liked, rated, inspired posts)
-    user_interactions = pd.concat([
-        viewed_posts[viewed_posts['User ID'] == user_id]['Post ID'],
-        liked_posts[liked_posts['User ID'] == user_id]['Post ID'],
-        rated_posts[rated_posts['User ID'] == user_id]['Post ID'],
-        inspired_posts[inspired_posts['User ID'] == user_id]['Post ID']
-    ]).unique().tolist()
-
-    # Generate hybrid recommendations for the user
-    recommended_posts = recommender.hybrid_recommendations(
-        user_id, user_interactions, mood='happy', category_id=None
-    )
-
-    # Evaluate recommendations using MAE and RMSE
-    mae, rmse = recommender.evaluate_recommendations(
-        user_id, user_interactions, recommended_posts
-    )
 
-    # Store evaluation results
-    evaluation_results.append({
-        'User ID': user_id,
-        'MAE': mae,
-        'RMSE': rmse
+from data import DATA_DIR, INTERACTIONS, load_tables
+from item_neighbors import compute as compute_item_neighbors
+from train import train
+
+# Strategies whose lists are ordered best first, so NDCG@k is meaningful for them
+RANKED_STRATEGIES = ('collaborative', 'content')
+
+# Users scored per pool task (and per RNG stream); also bounds the (users x posts) score block
+CHUNK_USERS = 256
+
+# Model being evaluated in a worker process, set once by _init_worker
+_model = None
+
+
+def time_split(tables, test_fraction=0.2):
+    """
+    Split the interaction tables at the timestamp below which `1 - test_fraction` of all
+    interactions fall. Returns (train tables, test tables, cutoff); the user and post
+    tables are shared by both.
+    """
+    stamps = np.concatenate([tables[name][column].to_numpy() for name, column in INTERACTIONS.items()])
+    cutoff = np.int64(np.quantile(stamps.astype(np.int64), 1 - test_fraction)).astype(stamps.dtype)
+    train_tables, test_tables = dict(tables), {}
+    for name, column in INTERACTIONS.items():
+        before = (tables[name][column] < cutoff).to_numpy()
+        train_tables[name] = tables[name][before].reset_index(drop=True)
+        test_tables[name] = tables[name][~before].reset_index(drop=True)
+    return train_tables, test_tables, pd.Timestamp(cutoff)
+
+
+def relevant_posts(recommender, test_tables):
+    """
+    Posts each user interacted with after the cutoff and not before, as (User IDs, CSR
+    offsets, Post IDs sorted within each user).
+    """
+    pairs = pd.concat(
+        [test_tables[name][['User ID', 'Post ID']] for name in INTERACTIONS], ignore_index=True
+    ).drop_duplicates()
+    users = pairs['User ID'].to_numpy(dtype=np.int64)
+    posts = pairs['Post ID'].to_numpy(dtype=np.int64)
+
+    # Drop pairs already in the training history
+    history = recommender.interactions
+    train_keys = np.unique(np.concatenate([
+        np.repeat(history.users.ids, np.diff(history.offsets[kind])) * (1 << 32)
+        + history.indices[kind].astype(np.int64)
+        for kind in history.indices
+    ]))
+    seen = np.isin(users * (1 << 32) + posts, train_keys)
+    users, posts = users[~seen], posts[~seen]
+
+    order = np.lexsort((posts, users))
+    users, posts = users[order], posts[order]
+    user_ids, counts = np.unique(users, return_counts=True)
+    return user_ids, np.concatenate(([0], np.cumsum(counts))), posts
+
+
+def _init_worker(recommender):
+    global _model
+    _model = recommender
+
+
+def _recommend_chunk(args):
+    """Recommendations for one chunk of users as an (n x k) array padded with -1."""
+    chunk, user_ids, k, strategy, mood, category_id, seed = args
+    _model.rng = np.random.default_rng([seed, chunk])
+    if strategy == 'collaborative':
+        lists = _model.collaborative_batch(user_ids, k)
+    elif strategy == 'content':
+        lists = [_model.content_based(_model.interactions.user_posts(user_id), user_id=user_id) for user_id in user_ids]
+    else:
+        lists = _model.recommend_batch(user_ids, mood, category_id)
+    recommended = np.full((len(user_ids), k), -1, dtype=np.int64)
+    for row, posts in enumerate(lists):
+        posts = posts[:k]
+        recommended[row, :len(posts)] = posts
+    return recommended
+
+
+def recommend(recommender, user_ids, k=10, strategy='hybrid', mood='happy', category_id=None, seed=0,
+              workers=1):
+    """
+    Top-k recommendations of every user in `user_ids` as an (n x k) array padded with -1,
+    from recommend_batch ('hybrid'), collaborative_batch ('collaborative') or
+    content_based ('content'). Chunks of CHUNK_USERS users run on `workers` processes.
+    """
+    tasks = [
+        (chunk, user_ids[start:start + CHUNK_USERS], k, strategy, mood, category_id, seed)
+        for chunk, start in enumerate(range(0, len(user_ids), CHUNK_USERS))
+    ]
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(recommender)
+        results = list(map(_recommend_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(recommender,)) as pool:
+            results = list(pool.map(_recommend_chunk, tasks))
+    return np.concatenate(results or [np.empty((0, k), dtype=np.int64)])
+
+
+def ranking_metrics(recommended, offsets, relevant, n_posts):
+    """
+    Mean precision@k, recall@k and NDCG@k over users, and catalog coverage, for an
+    (n x k) array of recommendations padded with -1 and per-user relevant Post IDs in
+    CSR form (`relevant[offsets[i]:offsets[i + 1]]`, sorted within each user).
+    """
+    n_users, k = recommended.shape
+    counts = np.diff(offsets)
+
+    # A hit is a (user row, post) pair present in the relevant set; encode pairs as keys
+    rows = np.repeat(np.arange(n_users, dtype=np.int64), k)
+    keys = rows * (1 << 32) + recommended.ravel()
+    relevant_keys = np.repeat(np.arange(n_users, dtype=np.int64), counts) * (1 << 32) + relevant
+    hits = (np.isin(keys, relevant_keys) & (recommended.ravel() >= 0)).reshape(n_users, k)
+
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal = np.concatenate(([0], np.cumsum(discounts)))[np.minimum(counts, k)]
+    found = hits.sum(axis=1)
+    recommended_posts = np.unique(recommended[recommended >= 0])
+    return {
+        'users': int(n_users),
+        'precision': float(np.mean(found / k)),
+        'recall': float(np.mean(found / np.maximum(counts, 1))),
+        'ndcg': float(np.mean((hits @ discounts) / np.where(ideal > 0, ideal, 1))),
+        'coverage': len(recommended_posts) / max(n_posts, 1),
+    }
+
+
+def evaluate(tables, k=10, test_fraction=0.2, strategy='hybrid', mood='happy', category_id=None,
+             seed=0, workers=1, max_users=None, item_neighbors=None):
+    """
+    Train on the interactions before the time cutoff and score the recommendations of
+    the users active after it (a seeded sample of `max_users` of them when given). With
+    `item_neighbors` set, a neighbour table of that many posts per post is built with
+    the model and used for content-based candidates. NDCG is None for unranked strategies.
+    """
+    train_tables, test_tables, cutoff = time_split(tables, test_fraction)
+    start = time.perf_counter()
+    recommender = train(train_tables)
+    if item_neighbors:
+        recommender.item_neighbors = compute_item_neighbors(recommender, item_neighbors, workers)
+    trained = time.perf_counter()
+
+    user_ids, offsets, relevant = relevant_posts(recommender, test_tables)
+    if max_users is not None and max_users < len(user_ids):
+        rows = np.sort(np.random.default_rng(seed).choice(len(user_ids), max_users, replace=False))
+        starts, ends = offsets[rows], offsets[rows + 1]
+        relevant = np.concatenate([relevant[s:e] for s, e in zip(starts, ends)] or [relevant[:0]])
+        offsets = np.concatenate(([0], np.cumsum(ends - starts)))
+        user_ids = user_ids[rows]
+
+    recommended = recommend(recommender, user_ids, k, strategy, mood, category_id, seed, workers)
+    results = ranking_metrics(recommended, offsets, relevant, len(recommender.posts.ids))
+    if strategy not in RANKED_STRATEGIES:
+        results['ndcg'] = None
+    results.update({
+        'k': k,
+        'strategy': strategy,
+        'cutoff': str(cutoff),
+        'train_seconds': trained - start,
+        'evaluate_seconds': time.perf_counter() - trained,
     })
-
-# Convert evaluation results into a DataFrame for analysis
-evaluation_df = pd.DataFrame(evaluation_results)
-
-# Calculate and print average MAE and RMSE across all users
-average_mae = evaluation_df['MAE'].mean()
-average_rmse = evaluation_df['RMSE'].mean()
-print(evaluation_df)  # Print individual user evaluation results
-print(f'Average MAE for all users: {average_mae}')
-print(f'Average RMSE for all users: {average_rmse}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--test-fraction', type=float, default=0.2,
+                        help='share of the interactions, by time, held out for testing')
+    parser.add_argument('--strategy', choices=['hybrid', 'collaborative', 'content'], default='hybrid')
+    parser.add_argument('--mood', default='happy', help="request mood for the hybrid strategy ('' for none)")
+    parser.add_argument('--category-id', type=int, help='request category for the hybrid strategy')
+    parser.add_argument('--users', type=int, help='evaluate a seeded sample of this many test users')
+    parser.add_argument('--item-neighbors', type=int, metavar='K',
+                        help='build an item neighbour table of K posts per post for content-based candidates')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory holding the columnar copies')
+    parser.add_argument('--csv-dir', default='.', help='directory holding the source CSVs')
+    args = parser.parse_args()
+
+    tables = load_tables(data_dir=args.data_dir, csv_dir=args.csv_dir)
+
+    results = evaluate(
+        tables, args.k, args.test_fraction, args.strategy, args.mood or None, args.category_id,
+        args.seed, args.workers, args.users, args.item_neighbors,
+    )
+    print(f"Trained on interactions before {results['cutoff']} in {results['train_seconds']:.2f}s; "
+          f"scored {results['users']} users in {results['evaluate_seconds']:.2f}s")
+    for metric in ('precision', 'recall', 'ndcg'):
+        if results[metric] is None:
+            print(f"{metric}@{args.k}: n/a (the {args.strategy} feed is shuffled, not ranked)")
+        else:
+            print(f"{metric}@{args.k}: {results[metric]:.4f}")
+    print(f"coverage: {results['coverage']:.4f}")
+
+
+if __name__ == '__main__':
+    main()
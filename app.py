@@ -1,136 +1,84 @@
-from flask import Flask, request, jsonify, render_template
+import time
+
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
-import numpy as np
-
-# Load data from CSV files into DataFrames
-viewed_posts = pd.read_csv('viewed_posts.csv')
-liked_posts = pd.read_csv('liked_posts.csv')
-rated_posts = pd.read_csv('rated_posts.csv')
-inspired_posts = pd.read_csv('inspired_posts.csv')
-users_data = pd.read_csv('cleaned_users_data.csv')
-posts_summary = pd.read_csv('cleaned_summary_posts.csv')
+from flask import Flask, Response, g, request, jsonify, render_template
+
+from cache import FeedCache
+from item_neighbors import ItemNeighbors
+from materialize import MaterializedFeeds
+from metrics import REGISTRY, end_trace, stage, start_trace
+from online import OnlineUpdater
+from reloader import ModelReloader
+from train import load_model, train
 
 # Initialize Flask app
 app = Flask(__name__)
 
-class Recommender:
-    """
-    A recommendation system that provides content-based, collaborative, 
-    and mood-based recommendations.
-    """
-    def __init__(self, posts_summary, rated_posts):
-        self.posts_summary = posts_summary
-        self.rated_posts = rated_posts
-
-        # Initialize collaborative filtering model using SVD
-        self.svd_model = None
-        self.create_svd_model()
-
-    def create_svd_model(self):
-        """Create an SVD model for collaborative filtering based on user ratings."""
-        # Pivot ratings data into a user-item matrix
-        ratings_matrix = self.rated_posts.pivot_table(
-            index='User ID', columns='Post ID', values='Rating Percent', aggfunc=np.mean
-        ).fillna(0)
-
-        # Apply Truncated SVD to reduce dimensionality
-        svd = TruncatedSVD(n_components=20)
-        self.svd_model = svd.fit_transform(ratings_matrix)
-
-        # Store the transformed user feature matrix
-        self.svd_matrix = pd.DataFrame(self.svd_model, index=ratings_matrix.index)
-
-    def content_based(self, user_posts):
-        """
-        Generate recommendations based on the content of posts the user has interacted with.
-        This method also adds diversity by recommending posts from similar categories.
-        """
-        if not user_posts:
-            return []
-
-        # Identify categories of the user's interacted posts
-        categories = self.posts_summary[self.posts_summary['Post ID'].isin(user_posts)]['category_name'].unique()
-
-        # Recommend posts from the same categories
-        recommended = self.posts_summary[self.posts_summary['category_name'].isin(categories)]
-        return recommended['Post ID'].sample(n=10).tolist()  # Randomly select posts
-
-    def collaborative(self, user_id):
-        """
-        Generate recommendations using collaborative filtering with SVD.
-        Recommends posts based on similar users' interactions.
-        """
-        if self.svd_model is None:
-            return []
-
-        # Recreate the ratings matrix
-        ratings_matrix = self.rated_posts.pivot_table(
-            index='User ID', columns='Post ID', values='Rating Percent', aggfunc=np.mean
-        ).fillna(0)
-
-        # Check if user_id exists in ratings_matrix
-        if user_id not in ratings_matrix.index:
-            return []  # Or handle the error as needed
-
-        # Locate the user's feature vector
-        user_idx = ratings_matrix.index.get_loc(user_id)
-        user_vector = self.svd_matrix.iloc[user_idx]
-
-        # Compute similarity between users
-        user_similarity = cosine_similarity([user_vector], self.svd_matrix)[0]
-        similar_users = ratings_matrix.index[np.argsort(user_similarity)[::-1]][1:5]  # Top 5 similar users
-
-        # Get recommendations based on similar users' ratings
-        recommendations = self.rated_posts[self.rated_posts['User ID'].isin(similar_users)]['Post ID']
-        return recommendations.value_counts().head(5).index.tolist()
-
-    def cold_start(self, mood):
-        """
-        Handle recommendations for new users based on their mood.
-        Moods are mapped to specific categories of posts.
-        """
-        mood_map = {
-            'happy': 'Motivational/Self-help',
-            'sad': 'Emotional Narrative',
-            'neutral': 'Philosophical Exploration'
-        }
-        category = mood_map.get(mood, 'Philosophical Exploration')
-
-        # Get posts in the mood's corresponding category
-        category_posts = self.posts_summary[self.posts_summary['category_name'] == category]
-
-        # Fallback to random posts if no category posts are available
-        if category_posts.empty:
-            return self.posts_summary['Post ID'].sample(n=10).tolist()
-        return category_posts['Post ID'].sample(n=10).tolist()
-
-    def hybrid_recommendations(self, user_id, user_posts, mood, category_id):
-        """
-        Combine content-based, collaborative, and cold-start recommendations into a hybrid model.
-        """
-        recommendations = []
-
-        # Add content-based recommendations
-        recommendations += self.content_based(user_posts)
-
-        # Add collaborative recommendations
-        recommendations += self.collaborative(user_id)
-
-        # Add cold-start recommendations if a mood is specified
-        if mood:
-            recommendations += self.cold_start(mood)
-
-        # Add category-based recommendations if a category is specified
-        if category_id:
-            recommendations += self.posts_summary[self.posts_summary['category_id'] == int(category_id)]['Post ID'].head(10).tolist()
-
-        # Deduplicate and randomize the final list
-        return list(set(np.random.choice(recommendations, 10, replace=False)))
-
-# Instantiate the Recommender class
-recommender = Recommender(posts_summary, rated_posts)
+# Load the latest saved model artifact (see train.py), or train one from the CSV files
+start = time.perf_counter()
+recommender = load_model()
+source = 'artifact'
+if recommender is None:
+    recommender = train()
+    source = 'trained'
+
+# Serve personal candidates from the materialized feed table when it matches the model
+feeds = MaterializedFeeds.load(model_version=recommender.model_version)
+
+
+def attach_item_neighbors(model):
+    """Merge precomputed item neighbour lists for content-based candidates when they match the model."""
+    model.item_neighbors = ItemNeighbors.load(model_version=model.model_version)
+
+
+attach_item_neighbors(recommender)
+
+# Live ratings are folded into the model; it is refitted in the background once they drift.
+# Requests read updater.recommender once and use that model throughout
+updater = OnlineUpdater(recommender, source=source, load_seconds=time.perf_counter() - start)
+
+
+# Candidate lists of recent /feed requests, keyed by user, mood, category and model version
+feed_cache = FeedCache()
+
+
+def load_feeds(model):
+    """Switch to the materialized feed table of a newly swapped-in model, if there is one."""
+    global feeds
+    new_feeds = MaterializedFeeds.load(model_version=model.model_version)
+    # The live ratings replayed onto the model are not in the table
+    if new_feeds is not None:
+        new_feeds.invalidate(updater.logged_users())
+    feeds = new_feeds
+    # Entries of the old model can no longer be hit; free them
+    feed_cache.clear()
+
+
+# Swap in newly published models without a restart; the item neighbour table is attached
+# before the model serves its first request
+reloader = ModelReloader(updater, prepare=attach_item_neighbors, on_swap=load_feeds).start()
+
+# Time every request; stages timed with metrics.stage() are added to the request's trace
+@app.before_request
+def start_timing():
+    g.start = time.perf_counter()
+    g.trace_token = start_trace()
+
+@app.after_request
+def record_timing(response):
+    elapsed = time.perf_counter() - g.start
+    stages = end_trace(g.pop('trace_token'))
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REGISTRY.increment('http_requests_total', endpoint=endpoint, status=response.status_code)
+    REGISTRY.observe('http_request_duration_seconds', elapsed, endpoint=endpoint)
+
+    # Clients can ask for the stage breakdown of their request as a Server-Timing header
+    if request.headers.get('X-Debug-Timing'):
+        response.headers['Server-Timing'] = ', '.join(
+            [f'{name};dur={seconds * 1000:.3f}' for name, seconds in stages]
+            + [f'total;dur={elapsed * 1000:.3f}']
+        )
+    return response
 
 # Flask route for home page
 @app.route('/')
@@ -148,31 +96,146 @@ def get_feed():
     - category_id: used for category-based recommendations
     """
     username = request.args.get('username').strip()
+    # Read before the model, so a rating folded in after this point keeps the feed out of the cache
+    sequence = feed_cache.sequence
+    recommender = updater.recommender
 
     category_id = request.args.get('category_id')
     mood = request.args.get('mood')
 
     # Retrieve user ID from username
-    user_row = users_data.loc[users_data['Username'] == username]
-    if user_row.empty:
+    with stage('user_lookup'):
+        user_id = recommender.usernames.get(username)
+    if user_id is None:
         return jsonify({'error': 'User not found'}), 404
-    user_id = int(user_row['User ID'].squeeze())
-
-    # Combine all user interactions (viewed, liked, rated, inspired posts)
-    user_interactions = pd.concat([
-        viewed_posts[viewed_posts['User ID'] == user_id]['Post ID'],
-        liked_posts[liked_posts['User ID'] == user_id]['Post ID'],
-        rated_posts[rated_posts['User ID'] == user_id]['Post ID'],
-        inspired_posts[inspired_posts['User ID'] == user_id]['Post ID']
-    ]).unique().tolist()
 
-    # Generate hybrid recommendations
-    recommended = recommender.hybrid_recommendations(user_id, user_interactions, mood, category_id)
+    # Serve the candidates of an identical recent request from the cache, before the mix.
+    # The parameters are normalized like the key, so requests with equal keys compute equal feeds
+    key = FeedCache.key(user_id, mood, category_id, recommender.model_version)
+    _, mood, category_id, _ = key
+    with stage('cache'):
+        candidates = feed_cache.get(key)
+    if candidates is None:
+        # Use the user's materialized candidates if available, otherwise compute them
+        fresh = feeds is not None and feeds.is_fresh(recommender.model_version)
+        with stage('materialized'):
+            candidates = feeds.candidates(user_id) if fresh else None
+        if candidates is None:
+            # Combine all user interactions (viewed, liked, rated, inspired posts)
+            with stage('interactions'):
+                user_interactions = recommender.interactions.user_posts(user_id)
+            candidates = recommender.personal_candidates(user_id, user_interactions)
+        candidates = candidates + recommender.request_candidates(mood, category_id)
+        feed_cache.put(key, candidates, sequence)
+
+    # Generate hybrid recommendations by randomly mixing the candidates
+    recommended = recommender.mix(list(candidates))
 
     # Fetch details of recommended posts
-    post_details = posts_summary[posts_summary['Post ID'].isin(recommended)][['title', 'category_name']].to_dict(orient='records')
+    with stage('details'):
+        post_details = recommender.posts.details(recommended)
     return jsonify(post_details)
 
+# Flask route for getting feeds for many users in one request
+@app.route('/feed/batch', methods=['POST'])
+def get_feed_batch():
+    """
+    Fetch recommendations for several users at once. Expects a JSON body with:
+    - usernames: list of usernames
+    - mood, category_id: optional, applied to every user as in /feed
+    """
+    payload = request.get_json(silent=True) or {}
+    usernames = payload.get('usernames', []) if isinstance(payload, dict) else None
+    if not isinstance(usernames, list) or not all(isinstance(username, str) for username in usernames):
+        return jsonify({'error': 'usernames must be a list of strings'}), 400
+    usernames = [username.strip() for username in usernames]
+    recommender = updater.recommender
+    mood = payload.get('mood')
+    category_id = payload.get('category_id')
+
+    # Resolve usernames, keeping unknown ones aside
+    known = [username for username in usernames if username in recommender.usernames]
+    not_found = [username for username in usernames if username not in recommender.usernames]
+    user_ids = [recommender.usernames[username] for username in known]
+
+    # Generate hybrid recommendations for the whole block of users
+    recommended = recommender.recommend_batch(user_ids, mood, category_id)
+
+    feeds = {username: recommender.posts.details(posts) for username, posts in zip(known, recommended)}
+    return jsonify({'feeds': feeds, 'not_found': not_found})
+
+# Flask route for submitting new ratings
+@app.route('/ratings', methods=['POST'])
+def post_ratings():
+    """
+    Fold new ratings into the model without a retrain. Expects a JSON body with:
+    - ratings: list of {username, post_id, rating_percent}
+    Ratings of unknown users or posts, or without a rating between 0 and 100, are returned
+    under rejected; a body whose ratings are not a list of objects gets a 400.
+    """
+    payload = request.get_json(silent=True) or {}
+    ratings = payload.get('ratings', []) if isinstance(payload, dict) else None
+    if not isinstance(ratings, list) or not all(isinstance(rating, dict) for rating in ratings):
+        return jsonify({'error': 'ratings must be a list of objects'}), 400
+    recommender = updater.recommender
+    rows, rejected = [], []
+    for rating in ratings:
+        username = rating.get('username')
+        user_id = recommender.usernames.get(username.strip()) if isinstance(username, str) else None
+        post_id = rating.get('post_id')
+        percent = rating.get('rating_percent')
+        # bool is a subclass of int, but true/false are not IDs or ratings
+        if (user_id is None or type(post_id) is not int or post_id not in recommender.posts.encoder
+                or isinstance(percent, bool) or not isinstance(percent, (int, float))
+                or not 0 <= percent <= 100):
+            rejected.append(rating)
+            continue
+        rows.append((user_id, post_id, percent))
+
+    updated = []
+    if rows:
+        updated = updater.update(pd.DataFrame(rows, columns=['User ID', 'Post ID', 'Rating Percent']))
+        # Every model copy shares the trending index, so the events are recorded once
+        if updater.recommender.trending is not None:
+            updater.recommender.trending.record('rated', [post_id for _, post_id, _ in rows])
+        # The materialized candidates of these users were computed from their old vectors
+        if feeds is not None:
+            feeds.invalidate(updated)
+        feed_cache.invalidate(updated)
+
+    return jsonify({
+        'updated_users': len(updated),
+        'rejected': rejected,
+        'model_version': updater.recommender.model_version,
+        'drift': updater.recommender.drift,
+    })
+
+# Flask route reporting the serving model
+@app.route('/admin/model', methods=['GET'])
+def get_model():
+    """Report the serving model's version, where it came from and how long it took to load."""
+    return jsonify(reloader.status())
+
+# Flask route for reloading the model without a restart
+@app.route('/admin/reload', methods=['POST'])
+def post_reload():
+    """
+    Load the latest published model on a background thread. Poll /admin/model for the
+    result. Retraining is not offered here: the route is unauthenticated and a retrain
+    fits a model on the source tables in this process; run train.py instead.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and payload.get('retrain'):
+        return jsonify({'error': 'retraining is not available over HTTP; run train.py to publish a model'}), 400
+    started = reloader.reload_async()
+    return jsonify(dict(reloader.status(), started=started)), 202 if started else 409
+
+# Flask route exposing request and stage latencies to Prometheus
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Counters and p50/p95/p99 latency summaries in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 # Run the Flask app
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
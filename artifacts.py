@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+# Versioned model artifacts live in MODELS_DIR/<model version>/, and MODELS_DIR/LATEST
+# holds the version the app should load
+MODELS_DIR = os.path.join('artifacts', 'models')
+LATEST = 'LATEST'
+
+
+def write_artifact(path, components, manifest):
+    """
+    Write `components` ({component: {name: array}}) as one .npy file per array under
+    `path`, plus a manifest.json. The directory is assembled next to its destination and
+    swapped in with `replace_directory`, so a partially written artifact is never visible
+    and an artifact rewritten in place never disappears.
+    """
+    staging = f'{path}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    for component, arrays in components.items():
+        os.makedirs(os.path.join(staging, component))
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, component, f'{name}.npy'), array)
+    manifest = dict(manifest, components={component: sorted(arrays) for component, arrays in components.items()})
+    with open(os.path.join(staging, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    replace_directory(staging, path)
+
+
+def replace_directory(staging, path):
+    """
+    Make the finished directory `staging` the one found at `path`, in one atomic step.
+    `path` is a symbolic link to a sibling directory named `<name>.<sequence>`; the link
+    is swapped with os.replace, so a reader finds either the old or the new directory,
+    never neither and never a mix. Readers should resolve the link once (see
+    `resolve`) and read every file from there. The directory just replaced is kept, so
+    a reader that resolved the link a moment before can finish; older ones are removed.
+    A `path` that is still a plain directory is renamed aside on the first swap.
+    """
+    parent, name = os.path.split(os.path.abspath(path))
+    target = f'{name}.{time.time_ns()}'
+    os.rename(staging, os.path.join(parent, target))
+    if os.path.isdir(path) and not os.path.islink(path):
+        os.rename(path, os.path.join(parent, f'{name}.0'))
+    previous = os.readlink(path) if os.path.islink(path) else f'{name}.0'
+
+    link = os.path.join(parent, f'{name}.link-{os.getpid()}')
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(target, link)
+    os.replace(link, path)
+
+    for entry in os.listdir(parent):
+        sequence = entry[len(name) + 1:]
+        if entry.startswith(f'{name}.') and sequence.isdigit() and entry not in (target, previous):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def resolve(path):
+    """The directory `path` points to now; read every file of one version from it."""
+    return os.path.realpath(path)
+
+
+def read_artifact(path, mmap_mode='r'):
+    """Load an artifact written by `write_artifact`; arrays are memory-mapped by default."""
+    path = resolve(path)
+    with open(os.path.join(path, 'manifest.json')) as file:
+        manifest = json.load(file)
+    components = {
+        component: {
+            name: np.load(os.path.join(path, component, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in names
+        }
+        for component, names in manifest['components'].items()
+    }
+    return components, manifest
+
+
+def publish(models_dir, version):
+    """Point MODELS_DIR/LATEST at `version`."""
+    staging = os.path.join(models_dir, f'{LATEST}.tmp-{os.getpid()}')
+    with open(staging, 'w') as file:
+        file.write(version)
+    os.replace(staging, os.path.join(models_dir, LATEST))
+
+
+def latest_version(models_dir=MODELS_DIR):
+    """The published model version, or None when nothing has been published yet."""
+    try:
+        with open(os.path.join(models_dir, LATEST)) as file:
+            version = file.read().strip()
+    except FileNotFoundError:
+        return None
+    return version if os.path.exists(os.path.join(models_dir, version, 'manifest.json')) else None
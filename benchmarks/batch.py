@@ -0,0 +1,55 @@
+"""
+Speed of Recommender.recommend_batch / collaborative_batch against the per-user loop, on
+the shipped CSVs and on ratings scaled up with benchmarks.svd_fit.scaled_ratings. Also
+checks that the batch collaborative results match the single-user path.
+
+Run from the repository root:  python -m benchmarks.batch
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.svd_fit import scaled_ratings
+from recommender import Recommender
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    posts_summary = pd.read_csv('cleaned_summary_posts.csv')
+    rated_posts = pd.read_csv('rated_posts.csv')
+
+    print(f"{'scale':>6} {'users':>7} {'stage':>14} {'loop s':>8} {'batch s':>8} {'speedup':>8}")
+    for scale in args.scales:
+        ratings = scaled_ratings(rated_posts, scale)
+        recommender = Recommender(posts_summary, ratings)
+        user_ids = recommender.user_encoder.ids
+
+        single, loop = timed(lambda: [recommender.collaborative(user_id) for user_id in user_ids])
+        batch, batched = timed(lambda: recommender.collaborative_batch(user_ids))
+        assert single == batch, 'batch and single-user collaborative results differ'
+        print(f"{scale:>6} {len(user_ids):>7} {'collaborative':>14} {loop:>8.3f} {batched:>8.3f} "
+              f"{loop / batched:>7.1f}x")
+
+        _, loop = timed(lambda: [
+            recommender.hybrid_recommendations(
+                user_id, recommender.interactions.user_posts(user_id), 'happy', None
+            )
+            for user_id in user_ids
+        ])
+        _, batched = timed(lambda: recommender.recommend_batch(user_ids, 'happy', None))
+        print(f"{scale:>6} {len(user_ids):>7} {'hybrid':>14} {loop:>8.3f} {batched:>8.3f} "
+              f"{loop / batched:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Stress test of request coalescing: many threads request /feed for the same few users
+with the same mood and category through the Flask test client, with the model's
+single-flight layer off and on. Reports wall time, process CPU time per request and how
+many collaborative, cold-start and category computations were shared. The feed cache
+and materialized feeds are disabled so every request reaches the recommender.
+
+Run from the repository root:  python -m benchmarks.coalescing --threads 32 --scale 100
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.suite import benchmark_tables
+from cache import FeedCache
+from coalesce import SingleFlight
+from metrics import REGISTRY
+from train import train
+
+
+def coalesced_calls():
+    """Calls that shared an in-flight result so far, by stage."""
+    return {dict(labels)['stage']: value for (name, labels), value in REGISTRY.counters.items()
+            if name == 'coalesced_calls_total'}
+
+
+def stress(app, usernames, threads, requests, category_id):
+    """Run `threads` x `requests` concurrent /feed calls; returns (wall seconds, CPU seconds)."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset):
+        client = app.app.test_client()
+        barrier.wait()
+        for i in range(requests):
+            response = client.get('/feed', query_string={
+                'username': usernames[(offset + i) % len(usernames)], 'mood': 'happy', 'category_id': category_id,
+            })
+            assert response.status_code == 200, response.status_code
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50, help='requests per thread')
+    parser.add_argument('--users', type=int, default=1, help='distinct hot users requested')
+    parser.add_argument('--scale', type=int, default=1, help='serve a model trained on synthetic tables this large')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Imported here: importing the app loads or trains its startup model
+    import app
+    app.reloader.stop()
+    app.feeds = None
+    app.feed_cache = FeedCache(max_entries=0)
+
+    if args.scale > 1:
+        app.updater.swap(train(benchmark_tables(args.scale, args.seed)), f'benchmark scale {args.scale}')
+    recommender = app.updater.recommender
+
+    rng = np.random.default_rng(args.seed)
+    rated = set(recommender.user_encoder.ids.tolist())
+    known = [username for username, user_id in recommender.usernames.items() if user_id in rated]
+    usernames = [known[i] for i in rng.choice(len(known), args.users, replace=False)]
+    category_id = int(np.bincount(recommender.trending.categories).argmax())
+    total = args.threads * args.requests
+
+    print(f"{'flights':>8} {'requests':>9} {'wall s':>8} {'req/s':>8} {'CPU ms/req':>11} {'shared calls':>24}")
+    for mode in ('off', 'on', 'off', 'on'):
+        recommender.flights = SingleFlight() if mode == 'on' else None
+        before = coalesced_calls()
+        wall, cpu = stress(app, usernames, args.threads, args.requests, category_id)
+        shared = {stage: count - before.get(stage, 0) for stage, count in coalesced_calls().items()}
+        shared = ' '.join(f'{stage}={count}' for stage, count in sorted(shared.items()) if count) or '-'
+        print(f"{mode:>8} {total:>9} {wall:>8.2f} {total / wall:>8.0f} {cpu / total * 1000:>11.3f} {shared:>24}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Load time and memory of the source tables: full CSV parsing (the previous loaders), CSV
+restricted to the serving columns, and the typed Feather copies written by data.py.
+Each mode runs in a fresh process so peak RSS is not shared between them.
+
+Run from the repository root after `python data.py`:  python -m benchmarks.data_load
+"""
+import io
+import multiprocessing
+import os
+import resource
+import time
+
+import pandas as pd
+
+import data
+
+MODES = ('csv', 'csv-columns', 'feather')
+
+
+def warm_up():
+    """Import pandas' CSV and Feather machinery on a one-row frame, outside the measurement."""
+    buffer = io.BytesIO()
+    pd.DataFrame({'x': [1]}).to_feather(buffer)
+    buffer.seek(0)
+    pd.read_feather(buffer)
+    pd.read_csv(io.StringIO('x\n1\n'))
+
+
+def load(mode):
+    """Load every table in `mode`; returns (seconds, peak RSS MiB, frame MiB)."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'csv':
+        tables = {name: pd.read_csv(path) for name, path in data.TABLE_FILES.items()}
+    elif mode == 'csv-columns':
+        tables = {
+            name: data.apply_schema(pd.read_csv(path, usecols=data.SERVING_COLUMNS[name]), data.SCHEMAS[name])
+            for name, path in data.TABLE_FILES.items()
+        }
+    else:
+        tables = data.load_tables()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    frames = sum(frame.memory_usage(deep=True).sum() for frame in tables.values())
+    return elapsed, peak / 1024, frames / 1024 ** 2
+
+
+def main():
+    for name in data.TABLE_FILES:
+        assert os.path.exists(data.columnar_path(name)), 'run `python data.py` first'
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'mode':>12} {'load ms':>8} {'peak RSS MiB':>13} {'frames MiB':>11}")
+    for mode in MODES:
+        with context.Pool(1) as pool:
+            pool.apply(warm_up)
+            elapsed, peak, frames = pool.apply(load, (mode,))
+        print(f"{mode:>12} {elapsed * 1e3:>8.1f} {peak:>13.1f} {frames:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Crawl time of the ingestion fetcher against the local stub API (ingestion.stub_server)
+with per-request latency and injected 503s, for different worker counts. Each run streams
+into its own temporary directory and must write the same files as the first one.
+
+Run from the repository root:  python -m benchmarks.ingestion
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from ingestion import ENDPOINTS, Fetcher, crawl
+from ingestion.stub_server import FIXTURE_FILES, StubApi, fixtures_from_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per stub response')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--fail-every', type=int, default=10)
+    args = parser.parse_args()
+
+    fixtures = [(ENDPOINTS[name], fixtures_from_csv(ENDPOINTS[name], path)) for name, path in FIXTURE_FILES.items()]
+    with StubApi(fixtures, latency=args.latency, fail_every=args.fail_every) as api:
+        expected = None
+        print(f"{'workers':>8} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+        for workers in args.workers:
+            fetcher = Fetcher(api.url, token='', workers=workers, rate=None,
+                              page_size=args.page_size, backoff=0.01)
+            with tempfile.TemporaryDirectory() as output_dir:
+                paths = {name: os.path.join(output_dir, spec.output) for name, spec in ENDPOINTS.items()}
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()) as log:
+                    for name, spec in ENDPOINTS.items():
+                        crawl(fetcher, spec, paths[name])
+                elapsed = time.perf_counter() - start
+                files = {}
+                for name, path in paths.items():
+                    with open(path, encoding='utf-8') as file:
+                        files[name] = file.read()
+            expected = expected or files
+            assert files == expected, 'concurrent crawl wrote different files'
+            pages = log.getvalue().count('Saved ')
+            print(f"{workers:>8} {pages:>6} {elapsed:>8.2f} {pages / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-user interaction lookup latency: the four boolean scans + concat + unique that /feed
+used to run, against InteractionStore.user_posts, as the interaction tables grow.
+
+Run from the repository root:  python -m benchmarks.interaction_lookup
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indexes import InteractionStore
+
+TABLES = {
+    'viewed': 'viewed_posts.csv',
+    'liked': 'liked_posts.csv',
+    'rated': 'rated_posts.csv',
+    'inspired': 'inspired_posts.csv',
+}
+
+
+def tiled(table, scale, user_stride):
+    """Repeat `table` `scale` times, shifting User IDs so each copy adds new users."""
+    copies = [table.assign(**{'User ID': table['User ID'] + i * user_stride}) for i in range(scale)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def scan_lookup(tables, user_id):
+    return pd.concat([
+        table[table['User ID'] == user_id]['Post ID'] for table in tables.values()
+    ]).unique().tolist()
+
+
+def timed(lookup, user_ids, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for user_id in user_ids:
+            lookup(user_id)
+    return (time.perf_counter() - start) / (repeat * len(user_ids)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--users', type=int, default=50, help='sampled users per scale')
+    args = parser.parse_args()
+
+    base = {kind: pd.read_csv(path, usecols=['Post ID', 'User ID']) for kind, path in TABLES.items()}
+    stride = max(int(table['User ID'].max()) for table in base.values()) + 1
+    rng = np.random.default_rng(0)
+
+    print(f"{'scale':>6} {'rows':>9} {'build ms':>9} {'scan us':>9} {'store us':>9}")
+    for scale in args.scales:
+        tables = {kind: tiled(table, scale, stride) for kind, table in base.items()}
+        start = time.perf_counter()
+        store = InteractionStore(tables)
+        build_ms = (time.perf_counter() - start) * 1e3
+        user_ids = rng.choice(store.users.ids, args.users).tolist()
+
+        for user_id in user_ids:
+            assert scan_lookup(tables, user_id) == store.user_posts(user_id)
+        scan_us = timed(lambda user_id: scan_lookup(tables, user_id), user_ids, 1)
+        store_us = timed(store.user_posts, user_ids, 20)
+        rows = sum(len(table) for table in tables.values())
+        print(f"{scale:>6} {rows:>9} {build_ms:>9.1f} {scan_us:>9.1f} {store_us:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Recall and latency of the similar-user search over 20-dimensional SVD user factors:
+the previous cosine_similarity + full argsort, ExactNeighbors, and IVFNeighbors at a few
+n_probe settings, on clustered synthetic user vectors.
+
+Run from the repository root:  python -m benchmarks.neighbors
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from neighbors import ExactNeighbors, IVFNeighbors
+
+
+def synthetic_factors(n_users, dims=20, n_clusters=200, seed=0):
+    """User vectors drawn around random cluster centres, like taste groups in SVD space."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_clusters, dims))
+    labels = rng.integers(0, n_clusters, n_users)
+    return (centres[labels] + 0.5 * rng.normal(size=(n_users, dims))).astype(np.float32)
+
+
+def argsort_query(vectors, row, k):
+    similarity = cosine_similarity([vectors[row]], vectors)[0]
+    return np.argsort(similarity)[::-1][1:k + 1]
+
+
+def timed(query, rows):
+    start = time.perf_counter()
+    results = [query(row) for row in rows]
+    return results, (time.perf_counter() - start) / len(rows) * 1e3
+
+
+def recall(results, truth):
+    hits = sum(len(np.intersect1d(found, expected)) for found, expected in zip(results, truth))
+    return hits / sum(len(expected) for expected in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--probes', type=int, nargs='+', default=[4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'method':>14} {'build s':>8} {'query ms':>9} {'recall':>7}")
+    for n_users in args.users:
+        vectors = synthetic_factors(n_users)
+        rows = np.random.default_rng(1).choice(n_users, args.queries, replace=False)
+
+        start = time.perf_counter()
+        exact = ExactNeighbors(vectors)
+        build = time.perf_counter() - start
+        truth, latency = timed(lambda row: exact.query(vectors[row], args.k, exclude=row), rows)
+        print(f"{n_users:>8} {'exact':>14} {build:>8.2f} {latency:>9.3f} {1:>7.3f}")
+
+        results, latency = timed(lambda row: argsort_query(vectors, row, args.k), rows[:20])
+        print(f"{n_users:>8} {'argsort':>14} {0:>8.2f} {latency:>9.3f} {recall(results, truth[:20]):>7.3f}")
+
+        start = time.perf_counter()
+        ivf = IVFNeighbors(vectors)
+        build = time.perf_counter() - start
+        for n_probe in args.probes:
+            ivf.n_probe = n_probe
+            results, latency = timed(lambda row: ivf.query(vectors[row], args.k, exclude=row), rows)
+            print(f"{n_users:>8} {f'ivf probe={n_probe}':>14} {build:>8.2f} {latency:>9.3f} "
+                  f"{recall(results, truth):>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Cost of absorbing a batch of new ratings with Recommender.update_ratings (fold-in onto the
+fixed item factors) against a full refit, on the shipped CSVs and on ratings scaled up
+with benchmarks.svd_fit.scaled_ratings. Half of each batch comes from users the model
+has not seen. Also checks that folding in users with no new ratings reproduces their
+fitted vectors.
+
+Run from the repository root:  python -m benchmarks.online_update
+"""
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.svd_fit import scaled_ratings
+from recommender import Recommender
+
+
+def new_ratings(recommender, size, seed=0):
+    """`size` ratings of known posts, half by known users and half by new ones."""
+    rng = np.random.default_rng(seed)
+    known = rng.choice(recommender.user_encoder.ids, size // 2)
+    unseen = recommender.user_encoder.ids.max() + 1 + rng.integers(0, size, size - size // 2)
+    return pd.DataFrame({
+        'User ID': np.concatenate([known, unseen]),
+        'Post ID': rng.choice(recommender.post_encoder.ids, size),
+        'Rating Percent': rng.integers(0, 101, size),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 1000])
+    args = parser.parse_args()
+
+    posts_summary = pd.read_csv('cleaned_summary_posts.csv')
+    rated_posts = pd.read_csv('rated_posts.csv')
+
+    print(f"{'scale':>6} {'ratings':>9} {'batch':>6} {'update ms':>10} {'refit ms':>9} {'speedup':>8}")
+    for scale in args.scales:
+        recommender = Recommender(posts_summary, scaled_ratings(rated_posts, scale))
+        projected = recommender.ratings_matrix @ recommender.item_factors
+        assert np.allclose(projected, recommender.svd_matrix), 'fold-in does not match the fitted vectors'
+
+        for size in args.batch_sizes:
+            ratings = new_ratings(recommender, size)
+            model = copy.copy(recommender)
+            start = time.perf_counter()
+            model.update_ratings(ratings)
+            update = time.perf_counter() - start
+            start = time.perf_counter()
+            model.refit()
+            refit = time.perf_counter() - start
+            print(f"{scale:>6} {len(recommender.rated_posts):>9} {size:>6} {update * 1000:>10.1f} "
+                  f"{refit * 1000:>9.1f} {refit / update:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Reproducible benchmark suite for the recommender: model construction, each candidate
+strategy, hybrid_recommendations and the /feed route through the Flask test client, on
+the shipped tables and on synthetic tables with every user, post and interaction count
+scaled up (10x-1000x). Data, user samples and the recommender's RNG are all seeded.
+
+Results are written as JSON so runs of different commits can be compared:
+
+    python -m benchmarks.suite --scales 1 10 100 --output before.json
+    python -m benchmarks.suite --scales 1 10 100 --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache import FeedCache
+from data import load_tables
+from synthetic import SyntheticDataset
+from train import train
+
+def benchmark_tables(scale, seed=0):
+    """
+    The shipped tables at scale 1, otherwise a synthetic.SyntheticDataset with `scale`
+    times their rows, generated in memory from `seed`.
+    """
+    if scale == 1:
+        return load_tables()
+    return SyntheticDataset.scaled(scale, seed).tables()
+
+
+def latency(calls, rounds=3):
+    """
+    Run the zero-argument callables `rounds` times after one untimed warm-up pass;
+    returns summary statistics of the per-call times in microseconds.
+    """
+    for call in calls:
+        call()
+    samples = []
+    for call in calls * rounds:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    samples = np.asarray(samples) * 1e6
+    return {
+        'calls': len(samples),
+        'mean_us': float(samples.mean()),
+        **{f'p{q}_us': float(np.percentile(samples, q)) for q in (50, 95, 99)},
+    }
+
+
+def run_scale(tables, scale, n_users, seed, client, updater):
+    """All benchmarks for one dataset; returns {benchmark: result}."""
+    start = time.perf_counter()
+    recommender = train(tables)
+    results = {'init': {'seconds': time.perf_counter() - start}}
+    recommender.rng = np.random.default_rng(seed)
+
+    # Sample users the collaborative model knows, so every strategy has work to do
+    rng = np.random.default_rng(seed)
+    rated = set(recommender.user_encoder.ids.tolist())
+    usernames = [username for username, user_id in recommender.usernames.items() if user_id in rated]
+    sample = [usernames[i] for i in rng.choice(len(usernames), min(n_users, len(usernames)), replace=False)]
+    user_ids = [recommender.usernames[username] for username in sample]
+    histories = [recommender.interactions.user_posts(user_id) for user_id in user_ids]
+    category_id = int(tables['posts_summary']['category_id'].mode()[0])
+
+    results['interactions'] = latency(
+        [lambda user_id=user_id: recommender.interactions.user_posts(user_id) for user_id in user_ids]
+    )
+    results['content_based'] = latency(
+        [lambda user_id=user_id, posts=posts: recommender.content_based(posts, user_id=user_id)
+         for user_id, posts in zip(user_ids, histories)]
+    )
+    results['collaborative'] = latency(
+        [lambda user_id=user_id: recommender.collaborative(user_id) for user_id in user_ids]
+    )
+    results['cold_start'] = latency([lambda: recommender.cold_start('happy')] * len(user_ids))
+    results['request_candidates'] = latency(
+        [lambda: recommender.request_candidates('happy', category_id)] * len(user_ids)
+    )
+    results['hybrid_recommendations'] = latency([
+        lambda user_id=user_id, posts=posts: recommender.hybrid_recommendations(
+            user_id, posts, 'happy', category_id
+        )
+        for user_id, posts in zip(user_ids, histories)
+    ])
+    start = time.perf_counter()
+    recommender.recommend_batch(user_ids, 'happy', category_id)
+    results['recommend_batch'] = {'seconds': time.perf_counter() - start, 'users': len(user_ids)}
+
+    # Serve this model from the app, without materialized feeds, and call /feed in-process
+    updater.swap(recommender, f'benchmark scale {scale}')
+    results['feed_route'] = latency([
+        lambda username=username: client.get(
+            '/feed', query_string={'username': username, 'mood': 'happy', 'category_id': category_id}
+        )
+        for username in sample
+    ])
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def headline(result):
+    """The number compared across runs: median latency, or total seconds for one-shot benchmarks."""
+    return result.get('p50_us', result.get('seconds'))
+
+
+def compare(runs, baseline):
+    """Print the change of every benchmark against a previous run of the suite."""
+    previous = {(run['scale'], name): headline(result)
+                for run in baseline['runs'] for name, result in run['results'].items()}
+    print(f"\nagainst {baseline['environment'].get('commit') or 'baseline'}:")
+    print(f"{'scale':>6} {'benchmark':>24} {'before':>12} {'after':>12} {'change':>8}")
+    for run in runs:
+        for name, result in run['results'].items():
+            before = previous.get((run['scale'], name))
+            if before is None:
+                continue
+            after = headline(result)
+            print(f"{run['scale']:>6} {name:>24} {before:>12.4g} {after:>12.4g} {after / before - 1:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--users', type=int, default=200, help='users sampled per latency benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    # Imported here: importing the app loads or trains its startup model
+    import app
+    app.reloader.stop()
+    app.feeds = None
+    app.feed_cache = FeedCache(max_entries=0)
+    client = app.app.test_client()
+
+    runs = []
+    print(f"{'scale':>6} {'benchmark':>24} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for scale in args.scales:
+        tables = benchmark_tables(scale, args.seed)
+        results = run_scale(tables, scale, args.users, args.seed, client, app.updater)
+        runs.append({
+            'scale': scale,
+            'rows': {name: len(frame) for name, frame in tables.items()},
+            'results': results,
+        })
+        for name, result in results.items():
+            if 'mean_us' in result:
+                print(f"{scale:>6} {name:>24} " + ' '.join(
+                    f"{result[key]:>8.1f}us" for key in ('mean_us', 'p50_us', 'p95_us', 'p99_us')
+                ))
+            else:
+                print(f"{scale:>6} {name:>24} {result['seconds']:>9.3f}s")
+
+    report = {'environment': environment(), 'seed': args.seed, 'users': args.users, 'runs': runs}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(runs, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare peak memory and fit time of the dense pivot and the sparse CSR pipelines that
+feed TruncatedSVD, on the shipped rated_posts.csv and on synthetic data scaled 10x / 100x.
+
+Run from the repository root:  python -m benchmarks.svd_fit
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import TruncatedSVD
+
+from indexes import build_interaction_matrix
+
+# Skip the dense pipeline when its pivot alone would need more than this many bytes
+DENSE_LIMIT_BYTES = 2 * 1024 ** 3
+
+
+def scaled_ratings(rated_posts, scale, seed=0):
+    """Synthetic ratings with `scale` times the users, posts and rows of `rated_posts`."""
+    if scale == 1:
+        return rated_posts
+    rng = np.random.default_rng(seed)
+    n_rows = len(rated_posts) * scale
+    n_users = rated_posts['User ID'].nunique() * scale
+    n_posts = rated_posts['Post ID'].nunique() * scale
+    # Power-law post popularity, uniform users and ratings
+    post_ids = np.minimum(rng.zipf(1.3, n_rows), n_posts)
+    return pd.DataFrame({
+        'User ID': rng.integers(1, n_users + 1, n_rows),
+        'Post ID': post_ids,
+        'Rating Percent': rng.integers(0, 101, n_rows),
+    })
+
+
+def measure(build):
+    """Run `build` followed by an SVD fit and return (seconds, peak traced bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    matrix = build()
+    TruncatedSVD(n_components=20, random_state=0).fit_transform(matrix)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def dense_pipeline(ratings):
+    return ratings.pivot_table(
+        index='User ID', columns='Post ID', values='Rating Percent', aggfunc='mean'
+    ).fillna(0)
+
+
+def sparse_pipeline(ratings):
+    return build_interaction_matrix(ratings, value_column='Rating Percent')[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    rated_posts = pd.read_csv('rated_posts.csv')
+    print(f"{'scale':>6} {'rows':>9} {'users':>7} {'posts':>7} {'pipeline':>8} {'fit s':>8} {'peak MiB':>9}")
+    for scale in args.scales:
+        ratings = scaled_ratings(rated_posts, scale)
+        n_users, n_posts = ratings['User ID'].nunique(), ratings['Post ID'].nunique()
+        for name, pipeline in (('dense', dense_pipeline), ('sparse', sparse_pipeline)):
+            if name == 'dense' and n_users * n_posts * 8 > DENSE_LIMIT_BYTES:
+                needed = n_users * n_posts * 8 / 1024 ** 2
+                print(f"{scale:>6} {len(ratings):>9} {n_users:>7} {n_posts:>7} {name:>8} "
+                      f"{'skipped':>8} {needed:>8.0f}+")
+                continue
+            elapsed, peak = measure(lambda: pipeline(ratings))
+            print(f"{scale:>6} {len(ratings):>9} {n_users:>7} {n_posts:>7} {name:>8} "
+                  f"{elapsed:>8.3f} {peak / 1024 ** 2:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Refresh cost of a full re-crawl versus an incremental sync of the interaction endpoints
+against the local stub API (ingestion.stub_server), for different amounts of new
+activity. The store starts with the first part of each listing; the rest is the new
+activity. Both refreshes must leave the same rows behind.
+
+Run from the repository root:  python -m benchmarks.sync
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from ingestion import ENDPOINTS, Fetcher, crawl, sync
+from ingestion.stub_server import FIXTURE_FILES, StubApi, fixtures_from_csv
+
+
+def refresh(api, fixtures, seed, refresh_with, page_size):
+    """Requests and seconds `refresh_with` takes to update a store seeded with `seed` records."""
+    fetcher = Fetcher(api.url, token='', rate=None, page_size=page_size)
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        paths = {}
+        for spec, records in fixtures:
+            paths[spec.name] = os.path.join(output_dir, spec.output)
+            api.fixtures[spec.path] = (spec, records[:seed[spec.name]])
+            sync(fetcher, spec, paths[spec.name])
+        for spec, records in fixtures:
+            api.fixtures[spec.path] = (spec, records)
+
+        requests, start = api.requests, time.perf_counter()
+        for spec, _ in fixtures:
+            refresh_with(fetcher, spec, paths[spec.name])
+        elapsed = time.perf_counter() - start
+        rows = 0
+        for path in paths.values():
+            with open(path, encoding='utf-8') as file:
+                rows += sum(1 for _ in file) - 1
+    return api.requests - requests, elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--new', type=float, nargs='+', default=[0.0, 0.01, 0.1, 0.5],
+                        help='fraction of each listing that is new activity')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per stub response')
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = [(spec, fixtures_from_csv(spec, FIXTURE_FILES[name])) for name, spec in ENDPOINTS.items()
+                if spec.timestamp]
+    with StubApi(fixtures, latency=args.latency) as api:
+        print(f"{'new':>6} {'full req':>9} {'full s':>7} {'sync req':>9} {'sync s':>7}")
+        for new in args.new:
+            seed = {spec.name: round(len(records) * (1 - new)) for spec, records in fixtures}
+            full = refresh(api, fixtures, seed, crawl, args.page_size)
+            delta = refresh(api, fixtures, seed, sync, args.page_size)
+            # Duplicate records re-listed at the same timestamp are dropped by the sync
+            assert delta[2] <= full[2], 'incremental sync kept more rows than the full crawl'
+            print(f"{new:>6.0%} {full[0]:>9} {full[1]:>7.2f} {delta[0]:>9} {delta[1]:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
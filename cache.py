@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+# Default bound on cached feeds and how long one is served, in seconds
+MAX_ENTRIES = 10000
+TTL = 30.0
+
+
+class FeedCache:
+    """
+    Bounded in-process cache of /feed candidate lists with TTL and LRU eviction.
+
+    Entries hold the candidates gathered before the final random mix, so a cached feed
+    is still shuffled differently on every request. Keys are the normalized request
+    parameters plus the model version (see `key`), so a swapped or refitted model never
+    serves another model's candidates. Lookups and evictions are counted in the metrics
+    registry.
+
+    A rating does not change the model version, so a feed computed from the model as it
+    was before `invalidate` could otherwise be put back under the same key afterwards.
+    Every invalidation takes the next `sequence` number and records it per user; a
+    request reads `sequence` before it reads the model, and `put` drops its candidates
+    when the user was invalidated since.
+
+    With `max_entries=0` the cache is disabled: nothing is stored and every lookup misses
+    without being counted, e.g. for benchmarks that must reach the recommender.
+    """
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, registry=REGISTRY, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.registry = registry
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> (expiry time, candidates), least recently used first
+        self.entries = OrderedDict()
+        # User ID -> keys of that user's entries, for invalidation
+        self.user_keys = {}
+        # Invalidations so far; User ID -> sequence of that user's last invalidation, and
+        # the sequence at which those records were last dropped (which stands for all users)
+        self.sequence = 0
+        self.invalidated = {}
+        self.forgotten = 0
+
+    @staticmethod
+    def key(user_id, mood, category_id, model_version):
+        """Cache key of a feed request; absent and blank parameters are the same request."""
+        mood = (mood or '').strip().lower() or None
+        category_id = str(category_id).strip() if category_id is not None else ''
+        category_id = int(category_id) if category_id.lstrip('-').isdigit() else category_id or None
+        return user_id, mood, category_id, model_version
+
+    def get(self, key):
+        """The cached candidates for `key`, or None when absent or expired."""
+        if not self.max_entries:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key, 'expired')
+                entry = None
+            if entry is None:
+                self.registry.increment('feed_cache_requests_total', result='miss')
+                return None
+            self.entries.move_to_end(key)
+        self.registry.increment('feed_cache_requests_total', result='hit')
+        return entry[1]
+
+    def put(self, key, candidates, sequence=None):
+        """
+        Cache `candidates` for `key`, evicting the least recently used entries beyond the
+        bound. With the `sequence` read before computing them, candidates of a user
+        invalidated since are dropped instead.
+        """
+        if not self.max_entries:
+            return
+        with self.lock:
+            if sequence is not None and max(self.forgotten, self.invalidated.get(key[0], 0)) > sequence:
+                self.registry.increment('feed_cache_stale_puts_total')
+                return
+            if key in self.entries:
+                del self.entries[key]
+            self.entries[key] = (self.clock() + self.ttl, tuple(candidates))
+            self.user_keys.setdefault(key[0], set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)), 'lru')
+
+    def invalidate(self, user_ids):
+        """Drop every cached feed of the given users, e.g. after their interactions changed."""
+        with self.lock:
+            self.sequence += 1
+            for user_id in user_ids:
+                self.invalidated[user_id] = self.sequence
+                for key in list(self.user_keys.get(user_id, ())):
+                    self._remove(key, 'invalidated')
+            # Bound the records: forgetting them invalidates every computation in flight
+            if len(self.invalidated) > self.max_entries:
+                self._forget()
+
+    def clear(self):
+        """Drop every entry, e.g. after a model swap."""
+        with self.lock:
+            self.sequence += 1
+            self._forget()
+            for key in list(self.entries):
+                self._remove(key, 'invalidated')
+
+    def _forget(self):
+        self.invalidated.clear()
+        self.forgotten = self.sequence
+
+    def _remove(self, key, reason):
+        del self.entries[key]
+        keys = self.user_keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.user_keys[key[0]]
+        self.registry.increment('feed_cache_evictions_total', reason=reason)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,56 @@
+import threading
+
+from metrics import REGISTRY
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller computes the result and
+    callers arriving while it runs wait for it and share it (or its exception) instead
+    of computing it again. Nothing is kept once the call finishes, so a later call
+    computes afresh. Callers must not mutate a shared result.
+
+    Keys are tuples whose first element names the stage; waiting callers are counted per
+    stage in the metrics registry.
+    """
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def __reduce__(self):
+        # Calls in flight belong to this process; an unpickled copy starts with none and
+        # reports to its own process's registry
+        return SingleFlight, ()
+
+    def do(self, key, function):
+        """Return `function()`, or the result of the identical call already in flight."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        if not leader:
+            self.registry.increment('coalesced_calls_total', stage=key[0])
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
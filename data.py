@@ -0,0 +1,129 @@
+import argparse
+import os
+import time
+import warnings
+
+import pandas as pd
+
+# Source table name -> CSV file
+TABLE_FILES = {
+    'viewed_posts': 'viewed_posts.csv',
+    'liked_posts': 'liked_posts.csv',
+    'rated_posts': 'rated_posts.csv',
+    'inspired_posts': 'inspired_posts.csv',
+    'users_data': 'cleaned_users_data.csv',
+    'posts_summary': 'cleaned_summary_posts.csv',
+}
+
+# Interaction tables and their timestamp columns
+INTERACTIONS = {
+    'viewed_posts': 'Viewed At',
+    'liked_posts': 'Liked At',
+    'rated_posts': 'Rated At',
+    'inspired_posts': 'Inspired At',
+}
+
+# Directory holding the columnar (Feather) copies of the tables
+DATA_DIR = 'data'
+
+# Explicit column types; columns not listed keep the types pandas infers
+SCHEMAS = {
+    'viewed_posts': {'Post ID': 'int32', 'User ID': 'int32', 'Viewed At': 'datetime64[s]'},
+    'liked_posts': {'Post ID': 'int32', 'User ID': 'int32', 'Liked At': 'datetime64[s]'},
+    'rated_posts': {
+        'Post ID': 'int32', 'User ID': 'int32', 'Rating Percent': 'int16', 'Rated At': 'datetime64[s]',
+    },
+    'inspired_posts': {'Post ID': 'int32', 'User ID': 'int32', 'Inspired At': 'datetime64[s]'},
+    'users_data': {'User ID': 'int32', 'Username': 'string', 'Role': 'category'},
+    'posts_summary': {
+        'Post ID': 'int32', 'category_id': 'int32', 'category_name': 'category', 'title': 'string',
+        'post_summary_genre': 'category',
+    },
+}
+
+# Columns the recommender needs from each table; everything else stays on disk
+SERVING_COLUMNS = {
+    'viewed_posts': ['Post ID', 'User ID', 'Viewed At'],
+    'liked_posts': ['Post ID', 'User ID', 'Liked At'],
+    'rated_posts': ['Post ID', 'User ID', 'Rating Percent', 'Rated At'],
+    'inspired_posts': ['Post ID', 'User ID', 'Inspired At'],
+    'users_data': ['User ID', 'Username'],
+    'posts_summary': [
+        'Post ID', 'category_id', 'category_name', 'title', 'post_summary_keywords',
+        'view_count', 'upvote_count', 'share_count', 'rating_count', 'created_at',
+    ],
+}
+
+
+def apply_schema(frame, schema):
+    """Cast the columns of `frame` that appear in `schema` to their declared types."""
+    for column, dtype in schema.items():
+        if column not in frame:
+            continue
+        if dtype.startswith('datetime64'):
+            frame[column] = pd.to_datetime(frame[column]).astype(dtype)
+        else:
+            frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def columnar_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f'{name}.feather')
+
+
+def is_stale(name, data_dir=DATA_DIR, csv_dir='.'):
+    """Whether the columnar copy of a table is older than its CSV, e.g. after an ingestion run."""
+    csv_path = os.path.join(csv_dir, TABLE_FILES[name])
+    return os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(columnar_path(name, data_dir))
+
+
+def load_table(name, columns=None, data_dir=DATA_DIR, csv_dir='.'):
+    """
+    Load one source table, reading only `columns` (all when None). The columnar copy is
+    used when it exists and is at least as new as the CSV; otherwise the CSV in `csv_dir`
+    is parsed and cast to the same schema.
+    """
+    path = columnar_path(name, data_dir)
+    if os.path.exists(path):
+        if not is_stale(name, data_dir, csv_dir):
+            return pd.read_feather(path, columns=columns)
+        warnings.warn(f"{path} is older than {TABLE_FILES[name]}, reading the CSV instead "
+                      f"(run data.py to refresh it)", stacklevel=2)
+    frame = pd.read_csv(os.path.join(csv_dir, TABLE_FILES[name]), usecols=columns)
+    return apply_schema(frame, SCHEMAS[name])
+
+
+def load_tables(names=None, columns=SERVING_COLUMNS, data_dir=DATA_DIR, csv_dir='.'):
+    """Load several source tables (all by default) with the serving columns."""
+    return {
+        name: load_table(name, None if columns is None else columns[name], data_dir, csv_dir)
+        for name in names or TABLE_FILES
+    }
+
+
+def convert(data_dir=DATA_DIR, csv_dir='.'):
+    """Write a typed Feather copy of every source CSV in `csv_dir` to `data_dir`."""
+    os.makedirs(data_dir, exist_ok=True)
+    for name, csv_file in TABLE_FILES.items():
+        frame = apply_schema(pd.read_csv(os.path.join(csv_dir, csv_file)), SCHEMAS[name])
+        staging = columnar_path(name, data_dir) + '.tmp'
+        frame.to_feather(staging)
+        os.replace(staging, columnar_path(name, data_dir))
+        yield name, len(frame)
+
+
+def main():
+    """Convert the source CSV files into typed columnar (Feather) files."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--data-dir', default=DATA_DIR, help='output directory')
+    parser.add_argument('--csv-dir', default='.', help='directory holding the source CSVs')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for name, rows in convert(args.data_dir, args.csv_dir):
+        print(f"Wrote {rows} rows to {columnar_path(name, args.data_dir)}")
+    print(f"Converted {len(TABLE_FILES)} tables in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
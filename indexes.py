@@ -0,0 +1,420 @@
+import json
+import math
+from functools import cached_property
+
+import numpy as np
+from scipy import sparse
+
+from data import INTERACTIONS
+from neighbors import top_k
+
+
+class IdEncoder:
+    """
+    Stable mapping between external IDs (User ID, Post ID) and dense integer positions.
+    IDs are assigned positions in sorted order, so the same input always produces the
+    same encoding and matches the row/column order of a pandas pivot table.
+    """
+    def __init__(self, ids=()):
+        self.ids = np.unique(np.asarray(ids, dtype=np.int64))
+
+    @cached_property
+    def index(self):
+        """ID -> position dict for single lookups, built on first use."""
+        return {id_: position for position, id_ in enumerate(self.ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.index
+
+    def encode(self, ids):
+        """Map an array of IDs to positions; unknown IDs are encoded as -1."""
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        positions = np.minimum(positions, max(len(self.ids) - 1, 0))
+        found = self.ids[positions] == ids if len(self.ids) else np.zeros(len(ids), dtype=bool)
+        return np.where(found, positions, -1)
+
+    def decode(self, positions):
+        """Map positions back to their external IDs."""
+        return self.ids[positions]
+
+    def to_arrays(self):
+        return {'ids': self.ids}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild an encoder from `to_arrays()` output without re-sorting the IDs."""
+        encoder = cls.__new__(cls)
+        encoder.ids = arrays['ids']
+        return encoder
+
+
+def csr_positions(indptr, rows):
+    """Positions in a CSR matrix's data/indices arrays of every entry of `rows`, row by row."""
+    starts, ends = indptr[rows], indptr[np.asarray(rows) + 1]
+    lengths = ends - starts
+    return np.repeat(ends - np.cumsum(lengths), lengths) + np.arange(lengths.sum())
+
+
+def build_interaction_matrix(interactions, value_column=None, users=None, posts=None,
+                             user_column='User ID', post_column='Post ID', return_counts=False):
+    """
+    Build a sparse CSR user-item matrix from an interaction table.
+
+    Rows follow the user encoder and columns the post encoder; encoders are created from
+    the table when not given, and interactions with unknown IDs are dropped. Repeated
+    (user, post) pairs are averaged, like `pivot_table(aggfunc='mean')`. Without a
+    `value_column` every interaction counts as 1.
+
+    Returns (matrix, user_encoder, post_encoder), plus, with `return_counts`, the number
+    of interactions averaged into each stored value, aligned with `matrix.data`.
+    """
+    if users is None:
+        users = IdEncoder(interactions[user_column].to_numpy())
+    if posts is None:
+        posts = IdEncoder(interactions[post_column].to_numpy())
+
+    rows = users.encode(interactions[user_column].to_numpy())
+    cols = posts.encode(interactions[post_column].to_numpy())
+    if value_column is None:
+        values = np.ones(len(interactions), dtype=np.float64)
+    else:
+        values = interactions[value_column].to_numpy(dtype=np.float64)
+
+    known = (rows >= 0) & (cols >= 0)
+    rows, cols, values = rows[known], cols[known], values[known]
+    shape = (len(users), len(posts))
+
+    # Summing duplicates for both the values and their counts gives two matrices with the
+    # same sparsity pattern, so the element-wise mean is a division of their data arrays
+    totals = sparse.csr_matrix((values, (rows, cols)), shape=shape)
+    counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+    totals.sum_duplicates()
+    counts.sum_duplicates()
+    totals.data /= counts.data
+    if return_counts:
+        return totals, users, posts, counts.data
+    return totals, users, posts
+
+
+class InteractionStore:
+    """
+    Per-user interaction history grouped once at load time.
+
+    Each interaction type (viewed, liked, rated, inspired) is kept in a CSR-style layout:
+    `indices` holds the Post IDs of the whole table sorted by user, and the posts of the
+    user at row `r` are `indices[offsets[r]:offsets[r + 1]]`. Rows come from a single
+    user encoder shared by every type, so fetching a history is an O(history) slice.
+    Types whose table carries its timestamp column also keep `timestamps`, in seconds
+    and aligned with `indices`.
+    """
+    def __init__(self, tables, user_column='User ID', post_column='Post ID'):
+        self.users = IdEncoder(np.concatenate(
+            [table[user_column].to_numpy(dtype=np.int64) for table in tables.values()] or [[]]
+        ))
+        self.offsets = {}
+        self.indices = {}
+        self.timestamps = {}
+        for kind, table in tables.items():
+            rows = self.users.encode(table[user_column].to_numpy())
+            # A stable sort keeps each user's posts in their original table order
+            order = np.argsort(rows, kind='stable')
+            self.indices[kind] = table[post_column].to_numpy(dtype=np.int32)[order]
+            self.offsets[kind] = np.concatenate(
+                ([0], np.cumsum(np.bincount(rows, minlength=len(self.users))))
+            ).astype(np.int64)
+            # Kinds are named after their tables: 'viewed' comes from viewed_posts
+            column = INTERACTIONS.get(f'{kind}_posts')
+            if column in table:
+                self.timestamps[kind] = table[column].to_numpy().astype('datetime64[s]').astype(np.int64)[order]
+
+    def user_posts(self, user_id, kinds=None):
+        """
+        Return the unique Post IDs the user interacted with, in table order
+        (by default viewed, liked, rated and then inspired).
+        """
+        row = self.users.index.get(user_id)
+        if row is None:
+            return []
+        posts = []
+        for kind in kinds or self.indices:
+            start, end = self.offsets[kind][row], self.offsets[kind][row + 1]
+            posts += self.indices[kind][start:end].tolist()
+        return list(dict.fromkeys(posts))
+
+    def recent_posts(self, user_id, n):
+        """
+        The user's `n` most recent unique Post IDs, most recent first, ordered by the last
+        time they interacted with each post in any way. Interactions without a timestamp
+        count as older than every timestamped one, later table rows as the more recent.
+        """
+        row = self.users.index.get(user_id)
+        if row is None:
+            return []
+        posts, stamps = [], []
+        for kind in self.indices:
+            start, end = self.offsets[kind][row], self.offsets[kind][row + 1]
+            posts.append(self.indices[kind][start:end])
+            kind_stamps = self.timestamps.get(kind)
+            stamps.append(kind_stamps[start:end] if kind_stamps is not None else np.full(end - start, -1))
+        posts, stamps = np.concatenate(posts), np.concatenate(stamps)
+        # Newest first, then keep each post's first (latest) occurrence
+        posts = posts[np.lexsort((np.arange(len(posts)), stamps))[::-1]]
+        _, first = np.unique(posts, return_index=True)
+        return posts[np.sort(first)[:n]].tolist()
+
+    def post_weights(self, user_id, post_ids, weights):
+        """
+        For each of `post_ids`, the sum of `weights[kind]` (1 for kinds not listed) over
+        the user's interactions with it; 0 for posts the user never interacted with.
+        """
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        totals = np.zeros(len(post_ids))
+        row = self.users.index.get(user_id)
+        if row is None or not len(post_ids):
+            return totals
+        # Look the interactions up in the sorted Post IDs; the histories are short
+        order = np.argsort(post_ids, kind='stable')
+        ordered = post_ids[order]
+        for kind in self.indices:
+            posts = self.indices[kind][self.offsets[kind][row]:self.offsets[kind][row + 1]]
+            positions = np.minimum(np.searchsorted(ordered, posts), len(ordered) - 1)
+            found = ordered[positions] == posts
+            np.add.at(totals, order[positions[found]], weights.get(kind, 1.0))
+        return totals
+
+    def to_arrays(self):
+        arrays = {'users': self.users.ids}
+        for kind in self.indices:
+            arrays[f'{kind}_offsets'] = self.offsets[kind]
+            arrays[f'{kind}_indices'] = self.indices[kind]
+            if kind in self.timestamps:
+                arrays[f'{kind}_timestamps'] = self.timestamps[kind]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, kinds):
+        """Rebuild a store from `to_arrays()` output; `kinds` gives the interaction type order."""
+        store = cls.__new__(cls)
+        store.users = IdEncoder.from_arrays({'ids': arrays['users']})
+        store.offsets = {kind: arrays[f'{kind}_offsets'] for kind in kinds}
+        store.indices = {kind: arrays[f'{kind}_indices'] for kind in kinds}
+        # Artifacts written before timestamps were kept have none
+        store.timestamps = {kind: arrays[f'{kind}_timestamps'] for kind in kinds if f'{kind}_timestamps' in arrays}
+        return store
+
+
+class PostStore:
+    """
+    Post metadata kept as column arrays addressed by Post ID, so fetching the details of
+    a handful of posts costs only those posts rather than a scan over the catalog.
+    """
+    def __init__(self, posts_summary, columns=('title', 'category_name')):
+        posts_summary = posts_summary.drop_duplicates('Post ID')
+        self.encoder = IdEncoder(posts_summary['Post ID'].to_numpy())
+        # IdEncoder positions are in Post ID order; reorder the columns to match and keep
+        # each post's row in the original frame so results can follow catalog order
+        order = np.argsort(posts_summary['Post ID'].to_numpy(), kind='stable')
+        self.rows = order
+        self.columns = {column: posts_summary[column].to_numpy()[order] for column in columns}
+
+    def __contains__(self, post_id):
+        return post_id in self.encoder
+
+    @property
+    def ids(self):
+        """Every Post ID in the store."""
+        return self.encoder.ids
+
+    def values(self, column, post_ids):
+        """Values of `column` for the known posts among `post_ids`."""
+        positions = self.encoder.encode(post_ids)
+        return self.columns[column][positions[positions >= 0]]
+
+    def details(self, post_ids, columns=None):
+        """Return one record per known post, in catalog order, like `to_dict(orient='records')`."""
+        positions = self.encoder.encode(np.unique(np.asarray(post_ids, dtype=np.int64)))
+        positions = positions[positions >= 0]
+        positions = positions[np.argsort(self.rows[positions])]
+        columns = columns or list(self.columns)
+        values = [self.columns[column][positions].tolist() for column in columns]
+        return [dict(zip(columns, record)) for record in zip(*values)]
+
+    def to_arrays(self):
+        # Object columns are stored as fixed-width strings so they can be memory-mapped
+        arrays = {'ids': self.encoder.ids, 'rows': self.rows}
+        for column, values in self.columns.items():
+            arrays[f'column_{column}'] = values.astype(str) if values.dtype == object else values
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        store = cls.__new__(cls)
+        store.encoder = IdEncoder.from_arrays(arrays)
+        store.rows = arrays['rows']
+        store.columns = {
+            name[len('column_'):]: values for name, values in arrays.items() if name.startswith('column_')
+        }
+        return store
+
+
+def sample_from(arrays, n, rng):
+    """
+    Draw up to `n` distinct items uniformly from the union of disjoint `arrays` without
+    concatenating them: positions are drawn over the combined length and mapped back to
+    their array, so the cost depends on the number of arrays and draws, not their size.
+    """
+    sizes = np.array([len(array) for array in arrays], dtype=np.int64)
+    total = int(sizes.sum())
+    if total == 0:
+        return []
+    draws = rng.choice(total, size=min(n, total), replace=False)
+    ends = np.cumsum(sizes)
+    which = np.searchsorted(ends, draws, side='right')
+    offsets = draws - (ends - sizes)[which]
+    return [arrays[array][offset].item() for array, offset in zip(which, offsets)]
+
+
+class CategoryIndex:
+    """Inverted index from a category key (category_name, category_id) to its Post IDs."""
+    def __init__(self, posts_summary, column):
+        post_ids = posts_summary['Post ID'].to_numpy(dtype=np.int64)
+        # Group positions are in catalog order, so slicing a category matches `head()`
+        groups = posts_summary.groupby(column, sort=False).indices
+        self.posts = {key: post_ids[positions] for key, positions in groups.items()}
+
+    def __contains__(self, key):
+        return key in self.posts
+
+    def get(self, key):
+        """Post IDs in the category, in catalog order (empty when the key is unknown)."""
+        return self.posts.get(key, np.empty(0, dtype=np.int64))
+
+    def sample(self, keys, n, rng):
+        """Sample up to `n` distinct posts across the given categories."""
+        return sample_from([self.get(key) for key in dict.fromkeys(keys)], n, rng)
+
+    def to_arrays(self):
+        keys = list(self.posts)
+        sizes = [len(self.posts[key]) for key in keys]
+        return {
+            'keys': np.asarray(keys, dtype=str if keys and isinstance(keys[0], str) else None),
+            'offsets': np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))),
+            'posts': np.concatenate([self.posts[key] for key in keys] or [np.empty(0, dtype=np.int64)]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        offsets, posts = arrays['offsets'], arrays['posts']
+        index.posts = {
+            key: posts[offsets[i]:offsets[i + 1]] for i, key in enumerate(arrays['keys'].tolist())
+        }
+        return index
+
+
+class KeywordIndex:
+    """
+    Content similarity over the weighted keywords of each post (post_summary_keywords).
+
+    The keyword JSON is parsed once into a sparse post x keyword CSR matrix of weights
+    with L2-normalized rows. A profile is the weighted sum of some posts' rows; every
+    post is scored against it with one sparse matrix-vector product, and the best posts
+    are picked with argpartition.
+    """
+    def __init__(self, posts_summary, column='post_summary_keywords'):
+        posts_summary = posts_summary.drop_duplicates('Post ID')
+        self.encoder = IdEncoder(posts_summary['Post ID'].to_numpy())
+        rows = self.encoder.encode(posts_summary['Post ID'].to_numpy())
+
+        post_rows, keywords, weights = [], [], []
+        for row, text in zip(rows.tolist(), posts_summary[column].tolist()):
+            for keyword, weight in parse_keywords(text):
+                post_rows.append(row)
+                keywords.append(keyword)
+                weights.append(weight)
+        vocabulary, columns = np.unique(np.asarray(keywords, dtype=str), return_inverse=True)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float32), (np.asarray(post_rows, dtype=np.int64), columns)),
+            shape=(len(self.encoder), len(vocabulary)),
+        )
+        matrix.sum_duplicates()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        matrix.data /= np.repeat(np.where(norms == 0, 1, norms), np.diff(matrix.indptr)).astype(np.float32)
+        self.matrix = matrix
+
+    def similar(self, post_ids, k, weights=None):
+        """
+        Up to `k` Post IDs most similar to the weighted sum of the given posts' keyword
+        vectors, best first, excluding those posts and posts sharing no keyword with them.
+        """
+        rows = self.encoder.encode(post_ids)
+        weights = np.ones(len(rows), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+        known = rows >= 0
+        rows, weights = rows[known], weights[known]
+        if not len(rows):
+            return []
+
+        # Gather the posts' rows straight from the CSR arrays and sum them per keyword
+        positions = csr_positions(self.matrix.indptr, rows)
+        lengths = self.matrix.indptr[rows + 1] - self.matrix.indptr[rows]
+        profile = np.bincount(
+            self.matrix.indices[positions], weights=self.matrix.data[positions] * np.repeat(weights, lengths),
+            minlength=self.matrix.shape[1],
+        ).astype(np.float32)
+
+        scores = self.matrix @ profile
+        scores[rows] = 0
+        best = top_k(scores, k)
+        return self.encoder.decode(best[scores[best] > 0]).tolist()
+
+    def to_arrays(self):
+        return {
+            'ids': self.encoder.ids,
+            'data': self.matrix.data,
+            'indices': self.matrix.indices,
+            'indptr': self.matrix.indptr,
+            'keywords': np.asarray([self.matrix.shape[1]], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index.encoder = IdEncoder.from_arrays(arrays)
+        index.matrix = sparse.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=(len(index.encoder), int(arrays['keywords'][0])),
+        )
+        return index
+
+
+def parse_keywords(text):
+    """
+    (keyword, weight) pairs from a post_summary_keywords value, a JSON list of
+    {"keyword": ..., "weight": ...} objects. Keywords are lower-cased and a missing weight
+    counts as 1; malformed values, and entries whose weight is not a finite number, give
+    no pairs.
+    """
+    if not isinstance(text, str):
+        return []
+    try:
+        entries = json.loads(text)
+    except ValueError:
+        return []
+    if not isinstance(entries, list):
+        return []
+    pairs = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('keyword'):
+            continue
+        try:
+            weight = float(entry.get('weight', 1))
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(weight):
+            pairs.append((str(entry['keyword']).strip().lower(), weight))
+    return pairs
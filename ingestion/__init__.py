@@ -0,0 +1,13 @@
+"""
+Paginated API ingestion: endpoint specs, a concurrent rate-limited fetcher, streaming
+CSV output and incremental sync of the timestamped interaction endpoints.
+"""
+from ingestion.client import ApiError, Fetcher, RateLimiter
+from ingestion.sink import CsvSink, crawl
+from ingestion.specs import ENDPOINTS, EndpointSpec, flatten_dict
+from ingestion.sync import SyncState, sync
+
+__all__ = [
+    'ApiError', 'CsvSink', 'ENDPOINTS', 'EndpointSpec', 'Fetcher', 'RateLimiter', 'SyncState',
+    'crawl', 'flatten_dict', 'sync',
+]
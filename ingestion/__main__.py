@@ -0,0 +1,45 @@
+import argparse
+import os
+import time
+
+from ingestion import ENDPOINTS, Fetcher, crawl, sync
+from ingestion.client import BASE_URL
+
+
+def main():
+    """Fetch API endpoints and stream each one to its CSV file, resuming interrupted crawls."""
+    parser = argparse.ArgumentParser(prog='python -m ingestion', description=main.__doc__)
+    parser.add_argument('endpoints', nargs='*', metavar='ENDPOINT',
+                        help=f"endpoints to fetch: {', '.join(ENDPOINTS)} (default: all)")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--workers', type=int, default=4, help='concurrent page requests')
+    parser.add_argument('--rate', type=float, default=2.0, help='max requests per second (0 = unlimited)')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='fetch only interactions newer than the last sync and append them')
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    fetcher = Fetcher(args.base_url, workers=args.workers, rate=args.rate or None,
+                      page_size=args.page_size, retries=args.retries)
+    for name in args.endpoints or ENDPOINTS:
+        spec = ENDPOINTS[name]
+        path = os.path.join(args.output_dir, spec.output)
+        start = time.perf_counter()
+        if args.incremental and spec.timestamp:
+            rows = sync(fetcher, spec, path)
+            print(f"Added {rows} new {name} records to {path} in {time.perf_counter() - start:.2f}s")
+            continue
+        rows = crawl(fetcher, spec, path)
+        if not rows:
+            print(f"No data to save for {name}")
+            continue
+        print(f"Saved {rows} {name} records to {path} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
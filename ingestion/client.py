@@ -0,0 +1,132 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://api.socialverseapp.com"
+# Algorithm parameter used for filtering resonance data
+RES_ALGO = "resonance_algorithm_cjsvervb7dbhss8bdrj89s44jfjdbsjd0xnjkbvuire8zcjwerui3njfbvsujc5if"
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApiError(Exception):
+    """A page could not be fetched, even after retries."""
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the worker threads: on average at most `rate` requests per
+    second, with bursts of up to `burst`. A rate of None disables limiting.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Taking the token up front (possibly going negative) queues callers fairly
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    Paginated API client: one pooled HTTP session, a thread pool fetching pages
+    concurrently under a shared rate limit, and retries with exponential backoff.
+    """
+    def __init__(self, base_url=BASE_URL, token=None, workers=4, rate=2.0, page_size=1000,
+                 retries=5, backoff=0.5, timeout=30):
+        if token is None:
+            load_dotenv()
+            token = os.environ.get('FLIC_TOKEN')
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers
+        self.page_size = page_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+
+        # One connection per worker, reused across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if token:
+            self.session.headers['Flic-Token'] = token
+
+    def get_page(self, spec, page):
+        """Fetch one page of `spec`; returns (items, total_pages)."""
+        url = f"{self.base_url}/{spec.path}"
+        params = {'page': page, 'page_size': self.page_size}
+        if spec.resonance:
+            params['resonance_algorithm'] = RES_ALGO
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            delay = self.backoff * 2 ** attempt * (1 + random.random())
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as error:
+                failure = error
+            else:
+                if response.status_code == 200:
+                    data = response.json()
+                    return data.get(spec.items_key, []), data.get(spec.pages_key, 1)
+                if response.status_code not in RETRY_STATUSES:
+                    raise ApiError(f"Failed to fetch {spec.path} page {page}: status {response.status_code}")
+                failure = f"status {response.status_code}"
+                # Honour the server's own back-off hint when it gives one in seconds
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            if attempt < self.retries:
+                time.sleep(delay)
+        raise ApiError(f"Failed to fetch {spec.path} page {page} after {self.retries + 1} attempts: {failure}")
+
+    def iter_pages(self, spec, first_page=1):
+        """
+        Yield (page, items, total_pages) in page order. The first page tells how many
+        pages there are; the rest are fetched concurrently, keeping a bounded window of
+        requests in flight. An empty page ends the crawl, like the sequential loop did.
+        """
+        items, total_pages = self.get_page(spec, first_page)
+        if not items:
+            return
+        yield first_page, items, total_pages
+
+        pending = deque()
+        next_page = first_page + 1
+        with ThreadPoolExecutor(self.workers) as pool:
+            try:
+                while pending or next_page <= total_pages:
+                    while next_page <= total_pages and len(pending) < 2 * self.workers:
+                        pending.append((next_page, pool.submit(self.get_page, spec, next_page)))
+                        next_page += 1
+                    page, future = pending.popleft()
+                    items, _ = future.result()
+                    if not items:
+                        return
+                    yield page, items, total_pages
+            finally:
+                for _, future in pending:
+                    future.cancel()
@@ -0,0 +1,128 @@
+import csv
+import json
+import os
+
+
+class CsvSink:
+    """
+    Append-only CSV output that commits one page at a time.
+
+    Rows go to `<path>.partial`; after each page the file is flushed and a checkpoint
+    (`<path>.checkpoint`) records the last committed page and the file size at that
+    point. An interrupted crawl reopens the partial file, drops anything written after
+    the checkpoint and resumes from the next page. `finish()` moves the completed file
+    to `path` and removes the checkpoint.
+
+    Endpoints without a fixed field map get a sorted header over every key seen so far;
+    when a page brings new keys the committed rows are rewritten under the wider header.
+    """
+    def __init__(self, path, spec, page_size):
+        self.path = path
+        self.partial_path = f'{path}.partial'
+        self.checkpoint_path = f'{path}.checkpoint'
+        self.spec = spec
+        self.page_size = page_size
+        self.file = None
+        self.writer = None
+
+        checkpoint = self._read_checkpoint()
+        if checkpoint is None:
+            self.page, self.rows, self.header = 0, 0, list(spec.fields)
+        else:
+            self.page, self.rows, self.header = checkpoint['page'], checkpoint['rows'], checkpoint['header']
+            self._open(truncate_to=checkpoint['bytes'])
+
+    @property
+    def next_page(self):
+        """The first page that still has to be fetched."""
+        return self.page + 1
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return None
+        # A different page size would shift page boundaries, so start over
+        if checkpoint.get('page_size') != self.page_size or not os.path.exists(self.partial_path):
+            return None
+        return checkpoint
+
+    def _open(self, truncate_to=None):
+        if truncate_to is None:
+            self.file = open(self.partial_path, mode='w', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=self.header)
+            self.writer.writeheader()
+        else:
+            os.truncate(self.partial_path, truncate_to)
+            self.file = open(self.partial_path, mode='a', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=self.header)
+
+    def _widen_header(self, rows):
+        new_keys = {key for row in rows for key in row} - set(self.header)
+        if not new_keys:
+            return
+        self.header = sorted(set(self.header) | new_keys)
+        if self.file is None:
+            return
+        # Rewrite the committed rows under the wider header
+        self.file.close()
+        with open(self.partial_path, newline='', encoding='utf-8') as file:
+            committed = list(csv.DictReader(file))
+        self._open()
+        self.writer.writerows(committed)
+
+    def write_page(self, page, rows):
+        """Append the rows of `page` and commit them with a checkpoint."""
+        if not self.spec.fields:
+            self._widen_header(rows)
+        if self.file is None:
+            self._open()
+        self.writer.writerows(rows)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        self.page = page
+        self.rows += len(rows)
+        checkpoint = {
+            'page': page, 'rows': self.rows, 'bytes': os.fstat(self.file.fileno()).st_size,
+            'header': self.header, 'page_size': self.page_size,
+        }
+        with open(f'{self.checkpoint_path}.tmp', 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(f'{self.checkpoint_path}.tmp', self.checkpoint_path)
+
+    def finish(self):
+        """Publish the completed file at `path`; returns False when nothing was fetched."""
+        self.close()
+        if not os.path.exists(self.partial_path):
+            return False
+        os.replace(self.partial_path, self.path)
+        os.remove(self.checkpoint_path)
+        return True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def crawl(fetcher, spec, path):
+    """
+    Stream every page of `spec` into the CSV at `path`, one page in memory at a time,
+    resuming from the checkpoint of an interrupted run. Returns the number of rows saved
+    (0 when the endpoint returned nothing).
+    """
+    with CsvSink(path, spec, fetcher.page_size) as sink:
+        if sink.page:
+            print(f"Resuming {spec.path} after page {sink.page} ({sink.rows} records)")
+        for page, items, total_pages in fetcher.iter_pages(spec, sink.next_page):
+            sink.write_page(page, spec.process(items))
+            print(f"Saved {spec.path} page {page}/{total_pages} ({len(items)} records)")
+        return sink.rows if sink.finish() else 0
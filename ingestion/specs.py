@@ -0,0 +1,100 @@
+import json
+from dataclasses import dataclass, field
+
+
+def flatten_dict(d, parent_key='', sep='_'):
+    """Flatten nested dicts into one level (keys joined by `sep`); lists become JSON strings."""
+    items = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        if isinstance(v, dict):
+            items.extend(flatten_dict(v, new_key, sep=sep).items())
+        elif isinstance(v, list):
+            items.append((new_key, json.dumps(v)))
+        else:
+            items.append((new_key, v))
+    return dict(items)
+
+
+@dataclass(frozen=True)
+class EndpointSpec:
+    """
+    Declarative description of one paginated API endpoint and the CSV it is saved to.
+
+    `fields` maps CSV columns to API keys; when it is empty every record is flattened
+    with `flatten_dict` and the CSV header is the sorted union of all keys.
+    `timestamp` names the CSV column the endpoint's records are ordered by, for
+    endpoints that can be synced incrementally.
+    """
+    name: str
+    path: str
+    output: str
+    fields: dict = field(default_factory=dict)
+    items_key: str = 'posts'
+    pages_key: str = 'max_page_size'
+    resonance: bool = True
+    timestamp: str = None
+
+    def process(self, items):
+        """Turn raw API records into CSV rows."""
+        if not self.fields:
+            return [flatten_dict(item) for item in items]
+        return [{column: item.get(key) for column, key in self.fields.items()} for item in items]
+
+
+ENDPOINTS = {spec.name: spec for spec in (
+    EndpointSpec(
+        name='viewed', path='posts/view', output='viewed_posts.csv', pages_key='total_pages',
+        fields={'Post ID': 'post_id', 'User ID': 'user_id', 'Viewed At': 'viewed_at'},
+        timestamp='Viewed At',
+    ),
+    EndpointSpec(
+        name='liked', path='posts/like', output='liked_posts.csv', pages_key='total_pages',
+        fields={'Post ID': 'post_id', 'User ID': 'user_id', 'Liked At': 'liked_at'},
+        timestamp='Liked At',
+    ),
+    EndpointSpec(
+        name='inspired', path='posts/inspire', output='inspired_posts.csv',
+        fields={'Post ID': 'post_id', 'User ID': 'user_id', 'Inspired At': 'inspired_at'},
+        timestamp='Inspired At',
+    ),
+    EndpointSpec(
+        name='rated', path='posts/rating', output='rated_posts.csv',
+        fields={
+            'Post ID': 'post_id', 'User ID': 'user_id',
+            'Rating Percent': 'rating_percent', 'Rated At': 'rated_at',
+        },
+        timestamp='Rated At',
+    ),
+    EndpointSpec(
+        name='summary', path='posts/summary/get', output='summary_posts.csv', resonance=False,
+    ),
+    EndpointSpec(
+        name='users', path='users/get_all', output='users_data.csv', items_key='users', resonance=False,
+        fields={
+            'User ID': 'id',
+            'First Name': 'first_name',
+            'Last Name': 'last_name',
+            'Username': 'username',
+            'Email': 'email',
+            'Role': 'role',
+            'Profile URL': 'profile_url',
+            'Bio': 'bio',
+            'Website URL': 'website_url',
+            'Instagram URL': 'instagram-url',
+            'YouTube URL': 'youtube_url',
+            'TikTok URL': 'tictok_url',
+            'Is Verified': 'isVerified',
+            'Referral Code': 'referral_code',
+            'Has Wallet': 'has_wallet',
+            'Last Login': 'last_login',
+            'Share Count': 'share_count',
+            'Post Count': 'post_count',
+            'Following Count': 'following_count',
+            'Follower Count': 'follower_count',
+            'Is Online': 'is_online',
+            'Latitude': 'latitude',
+            'Longitude': 'longitude',
+        },
+    ),
+)}
@@ -0,0 +1,143 @@
+"""
+Local stand-in for the API: serves fixture records page by page in the same response
+shape as the real endpoints, so the fetcher can be exercised offline. It can inject
+latency and transient failures to exercise concurrency and retries.
+
+Serve the repository CSVs:  python -m ingestion.stub_server --port 8000
+then fetch from it:         python -m ingestion --base-url http://127.0.0.1:8000
+"""
+import argparse
+import csv
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from ingestion.specs import ENDPOINTS
+
+# Repository CSV used as the fixture source of each endpoint
+FIXTURE_FILES = {
+    'viewed': 'viewed_posts.csv',
+    'liked': 'liked_posts.csv',
+    'inspired': 'inspired_posts.csv',
+    'rated': 'rated_posts.csv',
+    'summary': 'cleaned_summary_posts.csv',
+    'users': 'users_data.csv',
+}
+
+
+def fixtures_from_csv(spec, filename):
+    """API records rebuilt from a CSV the fetcher wrote, by inverting the spec's field map."""
+    with open(filename, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    if not spec.fields:
+        return rows
+    return [{key: row.get(column) for column, key in spec.fields.items()} for row in rows]
+
+
+class StubApi:
+    """
+    Threaded HTTP server answering GET /<spec.path>?page=N&page_size=M with a slice of
+    the fixture records. `fail_every=n` answers every n-th request with `fail_status`
+    (503 by default; 429 to simulate rate limiting), with a Retry-After header of
+    `retry_after` seconds when given, and `latency` delays each response by that many
+    seconds.
+    """
+    def __init__(self, fixtures, host='127.0.0.1', port=0, latency=0.0, fail_every=0, fail_status=503,
+                 retry_after=None):
+        self.fixtures = {spec.path: (spec, records) for spec, records in fixtures}
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with api.lock:
+                    api.requests += 1
+                    failing = api.fail_every and api.requests % api.fail_every == 0
+                if api.latency:
+                    time.sleep(api.latency)
+
+                parts = urlsplit(self.path)
+                entry = api.fixtures.get(parts.path.strip('/'))
+                if failing:
+                    self.send_response(api.fail_status)
+                    if api.retry_after is not None:
+                        self.send_header('Retry-After', str(api.retry_after))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if entry is None:
+                    self.send_error(404)
+                    return
+                spec, records = entry
+                query = parse_qs(parts.query)
+                page = int(query.get('page', ['1'])[0])
+                page_size = int(query.get('page_size', ['1000'])[0])
+                body = json.dumps({
+                    spec.items_key: records[(page - 1) * page_size:page * page_size],
+                    spec.pages_key: max(1, math.ceil(len(records) / page_size)),
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--fail-every', type=int, default=0, help='answer every n-th request with an error')
+    parser.add_argument('--fail-status', type=int, default=503, help='status of the injected errors, e.g. 429')
+    args = parser.parse_args()
+
+    fixtures = [(ENDPOINTS[name], fixtures_from_csv(ENDPOINTS[name], path)) for name, path in FIXTURE_FILES.items()]
+    api = StubApi(fixtures, port=args.port, latency=args.latency, fail_every=args.fail_every,
+                  fail_status=args.fail_status)
+    print(f"Serving {len(fixtures)} endpoints at {api.url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        api.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
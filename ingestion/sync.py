@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+
+from ingestion.sink import crawl
+
+
+def _row_key(row, header):
+    """A row as the strings csv writes, so API records compare equal to rows read back."""
+    return [str(row[column]) if row[column] is not None else '' for column in header]
+
+
+class SyncState:
+    """
+    High-water mark of an incrementally synced endpoint, kept in `<path>.sync`.
+
+    The interaction endpoints list records in ascending timestamp order, so everything
+    new sits after the records already stored. The state keeps how many records of the
+    listing have been consumed (`offset`), the newest timestamp stored (`watermark`),
+    the rows stored at that exact timestamp (`boundary`, to drop re-listed duplicates)
+    and the CSV size they were committed at (`bytes`).
+    """
+    def __init__(self, path, offset, watermark, boundary, size):
+        self.path = path
+        self.offset = offset
+        self.watermark = watermark
+        self.boundary = boundary
+        self.bytes = size
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(f'{path}.sync') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None
+        return cls(path, state['offset'], state['watermark'], [tuple(row) for row in state['boundary']],
+                   state['bytes'])
+
+    @classmethod
+    def scan(cls, path, spec):
+        """State of a CSV written by a full crawl, which mirrors the listing record for record."""
+        header = list(spec.fields)
+        offset, watermark, boundary = 0, '', []
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                offset += 1
+                stamp = row[spec.timestamp]
+                if stamp > watermark:
+                    watermark, boundary = stamp, []
+                if stamp == watermark:
+                    boundary.append(tuple(_row_key(row, header)))
+        return cls(path, offset, watermark, boundary, os.path.getsize(path))
+
+    def save(self):
+        state = {'offset': self.offset, 'watermark': self.watermark, 'boundary': self.boundary, 'bytes': self.bytes}
+        with open(f'{self.path}.sync.tmp', 'w') as file:
+            json.dump(state, file)
+        os.replace(f'{self.path}.sync.tmp', f'{self.path}.sync')
+
+    def discard(self):
+        if os.path.exists(f'{self.path}.sync'):
+            os.remove(f'{self.path}.sync')
+
+    def accept(self, row, header, timestamp):
+        """Whether `row` is new; advances the watermark past it when it is."""
+        stamp = str(row[timestamp])
+        key = tuple(_row_key(row, header))
+        if stamp < self.watermark or (stamp == self.watermark and key in self.boundary):
+            return False
+        if stamp > self.watermark:
+            self.watermark, self.boundary = stamp, []
+        self.boundary.append(key)
+        return True
+
+
+def _full_sync(fetcher, spec, path):
+    rows = crawl(fetcher, spec, path)
+    if rows:
+        SyncState.scan(path, spec).save()
+    return rows
+
+
+def sync(fetcher, spec, path):
+    """
+    Bring the CSV at `path` up to date with only the records listed since the last sync,
+    appending them after the stored ones. Records at or below the high-water mark are
+    dropped, and so are rows already stored at the mark itself. Each page is committed
+    (fsync, then the state) before the next, so an interrupted sync continues where it
+    stopped. The last stored record is fetched again as an anchor; without a CSV, or
+    when the listing no longer lines up with the stored records, the endpoint is
+    crawled in full. Returns the number of new rows.
+    """
+    if spec.timestamp is None:
+        raise ValueError(f"{spec.name} has no timestamp column to sync on")
+    header = list(spec.fields)
+    state = SyncState.load(path) if os.path.exists(path) else None
+    if state is None:
+        if not os.path.exists(path):
+            return _full_sync(fetcher, spec, path)
+        state = SyncState.scan(path, spec)
+        state.save()
+
+    # Drop whatever an interrupted sync appended after its last committed page
+    os.truncate(path, state.bytes)
+    added = 0
+    # Start one record early: the last stored record anchors the listing to the store
+    anchor = max(state.offset - 1, 0)
+    first_page = anchor // fetcher.page_size + 1
+    skip = anchor % fetcher.page_size
+    anchored = not state.offset
+    with open(path, mode='a', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=header)
+        for page, items, total_pages in fetcher.iter_pages(spec, first_page):
+            rows = spec.process(items)
+            if not anchored:
+                if len(rows) <= skip or tuple(_row_key(rows[skip], header)) not in state.boundary:
+                    break
+                anchored = True
+                rows = rows[skip + 1:]
+
+            kept = [row for row in rows if state.accept(row, header, spec.timestamp)]
+            writer.writerows(kept)
+            file.flush()
+            os.fsync(file.fileno())
+            added += len(kept)
+            state.offset = (page - 1) * fetcher.page_size + len(items)
+            state.bytes = os.fstat(file.fileno()).st_size
+            state.save()
+            print(f"Synced {spec.path} page {page}/{total_pages} ({len(kept)} new records)")
+    if anchored:
+        return added
+
+    # Records were removed or reordered upstream, so offsets no longer line up
+    print(f"{spec.path} listing changed since the last sync, crawling it in full")
+    state.discard()
+    return _full_sync(fetcher, spec, path)
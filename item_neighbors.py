@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from artifacts import replace_directory, resolve
+from indexes import IdEncoder
+from neighbors import top_k, top_k_rows
+from train import load_model, train
+
+# Default location of the item neighbour table
+ITEM_NEIGHBORS_DIR = os.path.join('artifacts', 'item_neighbors')
+
+# Neighbours kept per post
+NEIGHBORS = 20
+
+# Upper bound on the (posts x posts) similarity block scored at once, in elements
+BLOCK_ELEMENTS = 1 << 24
+
+# Features scored by the worker processes, set once by _init_worker
+_features = None
+
+
+class ItemNeighbors:
+    """
+    The `k` most similar posts of every post, stored as an (n_posts x k) int32 table of
+    Post IDs, best first and padded with -1; row `i` belongs to Post ID `post_ids[i]`.
+    Built offline by `compute`, so serving a user's content candidates is a merge of
+    the rows of their recent posts, O(history x k).
+    """
+    def __init__(self, post_ids, posts, model_version=None):
+        self.encoder = IdEncoder.from_arrays({'ids': post_ids})
+        self.posts = posts
+        self.model_version = model_version
+
+    @classmethod
+    def load(cls, path=ITEM_NEIGHBORS_DIR, model_version=None):
+        """Load the table at `path`, or return None if it is missing or was built for another model version."""
+        # Read every file from the same version of the table
+        path = resolve(path)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            return None
+        with open(os.path.join(path, 'meta.json')) as file:
+            meta = json.load(file)
+        neighbors = cls(
+            np.load(os.path.join(path, 'post_ids.npy')), np.load(os.path.join(path, 'posts.npy'), mmap_mode='r'),
+            meta['model_version'],
+        )
+        if model_version is not None and not neighbors.is_fresh(model_version):
+            return None
+        return neighbors
+
+    def is_fresh(self, model_version):
+        """Whether the table was built from the given model version."""
+        return self.model_version == model_version
+
+    def save(self, path=ITEM_NEIGHBORS_DIR):
+        """Write the table to a staging directory and swap it in at `path` in one step."""
+        staging = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        meta = {'model_version': self.model_version, 'k': self.posts.shape[1], 'created_at': time.time()}
+        np.save(os.path.join(staging, 'post_ids.npy'), self.encoder.ids)
+        np.save(os.path.join(staging, 'posts.npy'), self.posts)
+        with open(os.path.join(staging, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+        replace_directory(staging, path)
+
+    def merge(self, post_ids, n, exclude=None):
+        """
+        Up to `n` Post IDs from the neighbour lists of `post_ids`, leaving out `exclude`
+        (by default `post_ids` themselves). A neighbour scores k - rank in each list it
+        appears in; the highest totals win.
+        """
+        rows = self.encoder.encode(post_ids)
+        rows = rows[rows >= 0]
+        if not len(rows):
+            return []
+        k = self.posts.shape[1]
+        candidates = np.asarray(self.posts[rows]).ravel()
+        ranks = np.tile(np.arange(k, 0, -1), len(rows))
+        keep = (candidates >= 0) & ~np.isin(candidates, post_ids if exclude is None else exclude)
+        candidates, inverse = np.unique(candidates[keep], return_inverse=True)
+        scores = np.bincount(inverse, weights=ranks[keep])
+        return candidates[top_k(scores, n)].tolist()
+
+
+def item_features(recommender):
+    """
+    Sparse post features whose row products are the item similarity: each post's keyword
+    vector and its co-interaction vector (the users who viewed, liked, rated or were
+    inspired by it), each L2-normalized, side by side. The product of two rows is the
+    sum of the keyword cosine and the co-interaction cosine of the two posts.
+    Returns (Post IDs, CSR features).
+    """
+    posts = recommender.posts.encoder
+    interactions = recommender.interactions
+    rows, users = [], []
+    for kind in interactions.indices:
+        counts = np.diff(interactions.offsets[kind])
+        rows.append(posts.encode(interactions.indices[kind]))
+        users.append(np.repeat(np.arange(len(interactions.users)), counts))
+    rows, users = np.concatenate(rows), np.concatenate(users)
+    known = rows >= 0
+    co_interaction = sparse.csr_matrix(
+        (np.ones(known.sum(), dtype=np.float32), (rows[known], users[known])),
+        shape=(len(posts), len(interactions.users)),
+    )
+    co_interaction.sum_duplicates()
+    co_interaction.data[:] = 1
+    blocks = [_normalize_rows(co_interaction)]
+
+    if recommender.keywords is not None:
+        # Keyword rows are already normalized; align them with the catalog's Post IDs
+        keyword_rows = recommender.keywords.encoder.encode(posts.ids)
+        keywords = recommender.keywords.matrix[np.maximum(keyword_rows, 0)]
+        keywords = sparse.diags((keyword_rows >= 0).astype(np.float32)) @ keywords
+        blocks.append(keywords.astype(np.float32))
+    return posts.ids, sparse.hstack(blocks, format='csr')
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = matrix.copy()
+    matrix.data /= np.repeat(np.where(norms == 0, 1, norms), np.diff(matrix.indptr)).astype(matrix.dtype)
+    return matrix
+
+
+def _init_worker(features):
+    global _features
+    _features = (features, features.T.tocsc())
+
+
+def _block_neighbors(args):
+    """Neighbour positions of one block of rows, padded with -1 where no post is similar."""
+    start, end, k = args
+    features, transposed = _features
+    scores = (features[start:end] @ transposed).toarray()
+    scores[np.arange(end - start), np.arange(start, end)] = 0
+    best = top_k_rows(scores, k)
+    return np.where(np.take_along_axis(scores, best, axis=1) > 0, best, -1).astype(np.int32)
+
+
+def compute(recommender, k=NEIGHBORS, workers=1, block_elements=BLOCK_ELEMENTS):
+    """
+    Build the neighbour table of every post in the recommender's catalog. Similarities
+    are scored in blocks of rows against the whole catalog, sized to `block_elements`
+    so memory stays bounded, and the blocks run on `workers` processes.
+    """
+    post_ids, features = item_features(recommender)
+    n_posts = len(post_ids)
+    k = min(k, max(n_posts - 1, 1))
+    rows = max(1, block_elements // max(n_posts, 1))
+    tasks = [(start, min(start + rows, n_posts), k) for start in range(0, n_posts, rows)]
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(features)
+        blocks = list(map(_block_neighbors, tasks))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(features,)) as pool:
+            blocks = list(pool.map(_block_neighbors, tasks))
+    positions = np.concatenate(blocks or [np.empty((0, k), dtype=np.int32)])
+    posts = np.where(positions >= 0, post_ids[np.maximum(positions, 0)], -1).astype(np.int32)
+    return ItemNeighbors(post_ids, posts, recommender.model_version)
+
+
+def main():
+    """Compute the item neighbour table for every post in the catalog of the serving model."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--path', default=ITEM_NEIGHBORS_DIR, help='output directory')
+    parser.add_argument('--k', type=int, default=NEIGHBORS, help='neighbours per post')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--check', action='store_true',
+                        help='only report whether the existing table matches the current model')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the table is fresh')
+    args = parser.parse_args()
+
+    # Use the same model the app serves: the latest saved one, or a freshly trained one
+    recommender = load_model() or train()
+
+    existing = ItemNeighbors.load(args.path)
+    fresh = existing is not None and existing.is_fresh(recommender.model_version)
+    if args.check:
+        state = 'fresh' if fresh else 'stale' if existing is not None else 'missing'
+        print(f"Item neighbour table at {args.path} is {state} (model version {recommender.model_version})")
+        raise SystemExit(0 if fresh else 1)
+    if fresh and not args.force:
+        print(f"Item neighbour table at {args.path} is already up to date (model version {recommender.model_version})")
+        return
+
+    start = time.perf_counter()
+    neighbors = compute(recommender, args.k, args.workers)
+    neighbors.save(args.path)
+    print(f"Computed {args.k} neighbours for {len(neighbors.encoder)} posts in "
+          f"{time.perf_counter() - start:.2f}s to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
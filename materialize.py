@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from artifacts import replace_directory, resolve
+from data import load_table
+from item_neighbors import ItemNeighbors
+from train import load_model, train
+
+# Default location of the materialized feed table
+FEEDS_DIR = os.path.join('artifacts', 'feeds')
+
+# Width of a materialized row: 10 content-based plus 5 collaborative candidates
+FEED_WIDTH = 15
+
+
+class MaterializedFeeds:
+    """
+    Precomputed personal candidates (content-based + collaborative) for every user, stored
+    as a memory-mapped (users x FEED_WIDTH) int32 table of Post IDs padded with -1.
+    Serving a user is a dict lookup and one row read; mood/category candidates and the
+    final random mix still happen per request.
+    """
+    def __init__(self, path=FEEDS_DIR):
+        # Read all three files from the same version of the table
+        path = resolve(path)
+        with open(os.path.join(path, 'meta.json')) as file:
+            self.meta = json.load(file)
+        self.model_version = self.meta['model_version']
+        self.user_ids = np.load(os.path.join(path, 'user_ids.npy'))
+        self.posts = np.load(os.path.join(path, 'posts.npy'), mmap_mode='r')
+        self.rows = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+
+    @classmethod
+    def load(cls, path=FEEDS_DIR, model_version=None):
+        """Load the table at `path`, or return None if it is missing or was built for another model version."""
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            return None
+        feeds = cls(path)
+        if model_version is not None and not feeds.is_fresh(model_version):
+            return None
+        return feeds
+
+    def is_fresh(self, model_version):
+        """Whether the table was built from the given model version."""
+        return self.model_version == model_version
+
+    def invalidate(self, user_ids):
+        """Stop serving the rows of users whose model vectors changed since the table was built."""
+        for user_id in user_ids:
+            self.rows.pop(user_id, None)
+
+    def candidates(self, user_id):
+        """The user's materialized candidates, or None when the user is not in the table."""
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        posts = self.posts[row]
+        return posts[posts >= 0].tolist()
+
+
+def materialize(recommender, user_ids, path=FEEDS_DIR, width=FEED_WIDTH):
+    """Compute the personal candidates of every user and write them to `path`."""
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    posts = np.full((len(user_ids), width), -1, dtype=np.int32)
+
+    # Collaborative candidates come from the batched path, content-based ones per user
+    collaborative = recommender.collaborative_batch(user_ids)
+    for row, (user_id, user_collaborative) in enumerate(zip(user_ids, collaborative)):
+        candidates = recommender.personal_candidates(
+            user_id, recommender.interactions.user_posts(user_id), user_collaborative
+        )[:width]
+        posts[row, :len(candidates)] = candidates
+
+    # Write the whole table next to `path` and swap it in at once, so a reader never
+    # pairs the rows of one build with the users of another
+    staging = f'{path}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    meta = {'model_version': recommender.model_version, 'width': width, 'created_at': time.time()}
+    np.save(os.path.join(staging, 'user_ids.npy'), user_ids)
+    np.save(os.path.join(staging, 'posts.npy'), posts)
+    with open(os.path.join(staging, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+    replace_directory(staging, path)
+    return posts
+
+
+def main():
+    """Materialize the feed table for every user in cleaned_users_data."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--path', default=FEEDS_DIR, help='output directory')
+    parser.add_argument('--check', action='store_true',
+                        help='only report whether the existing table matches the current model')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the table is fresh')
+    args = parser.parse_args()
+
+    # Use the same model the app serves: the latest saved one, or a freshly trained one
+    recommender = load_model() or train()
+    recommender.item_neighbors = ItemNeighbors.load(model_version=recommender.model_version)
+    users_data = load_table('users_data', columns=['User ID'])
+
+    existing = MaterializedFeeds.load(args.path)
+    fresh = existing is not None and existing.is_fresh(recommender.model_version)
+    if args.check:
+        state = 'fresh' if fresh else 'stale' if existing is not None else 'missing'
+        print(f"Feed table at {args.path} is {state} (model version {recommender.model_version})")
+        raise SystemExit(0 if fresh else 1)
+    if fresh and not args.force:
+        print(f"Feed table at {args.path} is already up to date (model version {recommender.model_version})")
+        return
+
+    start = time.perf_counter()
+    posts = materialize(recommender, users_data['User ID'].unique(), args.path)
+    print(f"Materialized {len(posts)} feeds in {time.perf_counter() - start:.2f}s to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
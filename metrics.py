@@ -0,0 +1,123 @@
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Quantiles reported for every latency summary, over its most recent WINDOW observations
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 2048
+
+# Metric name -> (Prometheus type, help text)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint and status code.'),
+    'http_request_duration_seconds': ('summary', 'Request latency, by endpoint.'),
+    'recommender_stage_seconds': ('summary', 'Latency of each stage of building a feed.'),
+    'feed_cache_requests_total': ('counter', 'Feed cache lookups, by result (hit or miss).'),
+    'feed_cache_evictions_total': ('counter', 'Feed cache entries removed, by reason (lru, expired or invalidated).'),
+    'feed_cache_stale_puts_total': ('counter', 'Feeds left uncached as their user was invalidated meanwhile.'),
+    'coalesced_calls_total': ('counter', 'Calls that waited for an identical call in flight, by stage.'),
+}
+
+# Stage timings of the request being handled, when one is being traced
+_trace = contextvars.ContextVar('trace', default=None)
+
+
+class Summary:
+    """Observation count and sum over the process lifetime, plus a window of recent values for quantiles."""
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantiles(self):
+        if not self.recent:
+            return [math.nan] * len(QUANTILES)
+        return np.quantile(np.fromiter(self.recent, dtype=np.float64), QUANTILES).tolist()
+
+
+class Registry:
+    """Thread-safe counters and latency summaries, rendered in the Prometheus text format."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.summaries = {}
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            summary = self.summaries.get(key)
+            if summary is None:
+                summary = self.summaries[key] = Summary()
+            summary.observe(value)
+
+    def render(self):
+        """The current values in the Prometheus text exposition format."""
+        with self.lock:
+            counters = dict(self.counters)
+            summaries = {key: (summary.count, summary.sum, summary.quantiles())
+                         for key, summary in self.summaries.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+            for (metric, labels), (count, total, quantiles) in sorted(summaries.items()):
+                if metric != name:
+                    continue
+                for quantile, value in zip(QUANTILES, quantiles):
+                    lines.append(f'{name}{_labels(labels + (("quantile", quantile),))} {value:.6g}')
+                lines.append(f'{name}_sum{_labels(labels)} {total:.6g}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+# Process-wide registry served at /metrics
+REGISTRY = Registry()
+
+
+@contextmanager
+def stage(name, registry=REGISTRY):
+    """Time the enclosed block as feed-building stage `name`, adding it to the current trace if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe('recommender_stage_seconds', elapsed, stage=name)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((name, elapsed))
+
+
+def start_trace():
+    """Collect the stage timings of the current request; returns the token for `end_trace`."""
+    return _trace.set([])
+
+
+def end_trace(token):
+    """Stop collecting and return the (stage, seconds) pairs recorded since `start_trace`."""
+    trace = _trace.get()
+    _trace.reset(token)
+    return trace or []
@@ -0,0 +1,139 @@
+import copy
+
+import numpy as np
+
+
+def normalize(vectors):
+    """L2-normalize rows as float32 so cosine similarity becomes a dot product."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.ascontiguousarray(vectors / np.where(norms == 0, 1, norms))
+
+
+def top_k(scores, k):
+    """Positions of the `k` highest scores, best first, using argpartition."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def top_k_rows(scores, k):
+    """Per-row positions of the `k` highest scores of a 2-D array, best first."""
+    if k >= scores.shape[1]:
+        return np.argsort(-scores, axis=1, kind='stable')
+    candidates = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _grow(array, positions, size):
+    """`array` with its rows moved to `positions` of a larger zero-filled array of `size` rows."""
+    grown = np.zeros((size,) + array.shape[1:], dtype=array.dtype)
+    grown[positions] = array
+    return grown
+
+
+class ExactNeighbors:
+    """
+    Brute-force cosine neighbour search over pre-normalized vectors: one matrix-vector
+    product and an argpartition, O(N x dims) per query.
+    """
+    def __init__(self, vectors):
+        self.vectors = normalize(vectors)
+
+    def query(self, vector, k, exclude=None):
+        """Rows of the `k` most similar vectors, most similar first, skipping row `exclude`."""
+        scores = self.vectors @ normalize(vector)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        rows = top_k(scores, k)
+        return rows[rows != exclude] if exclude is not None else rows
+
+    def update(self, vectors, rows, positions=None):
+        """
+        A copy of the index after the vectors at `rows` of `vectors` (the full new set)
+        changed; this index is left as it is, so it can keep serving. When vectors were
+        inserted, `positions` gives the new row of every indexed vector.
+        """
+        index = copy.copy(self)
+        if positions is not None:
+            index.vectors = _grow(self.vectors, positions, len(vectors))
+        else:
+            index.vectors = self.vectors.copy()
+        index.vectors[rows] = normalize(vectors[rows])
+        return index
+
+
+class IVFNeighbors:
+    """
+    Approximate cosine neighbour search with an inverted file: vectors are clustered with
+    spherical k-means and a query only scores the vectors of its `n_probe` closest
+    clusters. Cost per query is O(n_lists + N x n_probe / n_lists) instead of O(N).
+    """
+    def __init__(self, vectors, n_lists=None, n_probe=8, n_iter=10, sample_size=50000, seed=0):
+        self.vectors = normalize(vectors)
+        self.n_probe = n_probe
+        n_lists = n_lists or max(1, int(np.sqrt(len(self.vectors))))
+        rng = np.random.default_rng(seed)
+
+        # Train the centroids on a sample, then assign every vector to its closest one
+        sample = self.vectors
+        if len(sample) > sample_size:
+            sample = sample[rng.choice(len(sample), sample_size, replace=False)]
+        self.centroids = self._kmeans(sample, min(n_lists, len(sample)), n_iter, rng)
+        self.lists = self._assign(self.vectors)
+        self._group()
+
+    def _group(self):
+        # CSR-style inverted lists: rows grouped by cluster with per-cluster offsets
+        self.order = np.argsort(self.lists, kind='stable')
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(self.lists, minlength=len(self.centroids)))))
+
+    def _assign(self, vectors, block_size=65536):
+        return np.concatenate([
+            np.argmax(vectors[start:start + block_size] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), block_size)
+        ] or [np.empty(0, dtype=np.int64)])
+
+    @staticmethod
+    def _kmeans(sample, n_lists, n_iter, rng):
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            # Keep the previous centroid for clusters that ended up empty
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+        return centroids
+
+    def query(self, vector, k, exclude=None):
+        """Approximate rows of the `k` most similar vectors, most similar first."""
+        vector = normalize(vector)
+        probes = top_k(self.centroids @ vector, self.n_probe)
+        candidates = np.concatenate([
+            self.order[self.offsets[probe]:self.offsets[probe + 1]] for probe in probes
+        ])
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        return candidates[top_k(self.vectors[candidates] @ vector, k)]
+
+    def update(self, vectors, rows, positions=None):
+        """
+        A copy of the index with the vectors at `rows` of `vectors` (the full new set)
+        replaced and assigned to their closest centroids; the centroids are not retrained
+        and this index is left as it is. `positions` is as in ExactNeighbors.update.
+        """
+        index = copy.copy(self)
+        if positions is not None:
+            index.vectors = _grow(self.vectors, positions, len(vectors))
+            index.lists = _grow(self.lists, positions, len(vectors))
+        else:
+            index.vectors = self.vectors.copy()
+            index.lists = self.lists.copy()
+        index.vectors[rows] = normalize(vectors[rows])
+        index.lists[rows] = index._assign(index.vectors[rows])
+        index._group()
+        return index
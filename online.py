@@ -0,0 +1,134 @@
+import copy
+import threading
+import time
+
+import pandas as pd
+
+# Refit once the folded-in ratings reach this fraction of the ratings the model was fitted on
+MAX_DRIFT = 0.1
+
+
+class OnlineUpdater:
+    """
+    Applies live ratings to the serving model and decides when to refit it.
+
+    Each update folds the ratings into a shallow copy of the current model
+    (Recommender.update_ratings) and then swaps the copy in, so a request always works
+    on one consistent model. A full refit runs on a background thread once the drift
+    reaches `max_drift`, or once the fit is older than `refit_interval` seconds and has
+    absorbed ratings; ratings arriving during the refit are replayed onto the refitted
+    model before it replaces the serving one.
+
+    `swap` replaces the serving model with a separately built one (see reloader.py);
+    a refit still running on the model it replaced is discarded. Live ratings are never
+    written back to the source tables, so every rating absorbed since startup is kept
+    in `log` and replayed onto a swapped-in model before it is served.
+    """
+    def __init__(self, recommender, max_drift=MAX_DRIFT, refit_interval=None, source='startup',
+                 load_seconds=None):
+        self.max_drift = max_drift
+        self.refit_interval = refit_interval
+        self.lock = threading.Lock()
+        # Frames of every rating absorbed since startup, in order
+        self.log = []
+        # Length of the log when the running refit started, or None when no refit is running
+        self.refit_from = None
+        self.thread = None
+        # Bumped on every swap, so a refit of a replaced model is not swapped back in
+        self.generation = 0
+        self._serve(recommender, source, load_seconds)
+
+    def _serve(self, recommender, source, load_seconds):
+        self.recommender = recommender
+        self.source = source
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+
+    def swap(self, recommender, source, load_seconds=None):
+        """
+        Serve `recommender` from now on, with the logged ratings folded into it first;
+        requests already running finish on the old model. Most of the replay runs before
+        taking the lock, so live updates only wait for the ratings that arrived meanwhile.
+        """
+        with self.lock:
+            replayed = len(self.log)
+        if replayed:
+            recommender.update_ratings(pd.concat(self.log[:replayed], ignore_index=True))
+        with self.lock:
+            if len(self.log) > replayed:
+                recommender.update_ratings(pd.concat(self.log[replayed:], ignore_index=True))
+            self.generation += 1
+            self.refit_from = None
+            self._serve(recommender, source, load_seconds)
+            if self.refit_due():
+                self._start_refit()
+
+    def logged_users(self):
+        """User IDs of every rating absorbed since startup."""
+        with self.lock:
+            log = list(self.log)
+        return pd.concat(log)['User ID'].unique().tolist() if log else []
+
+    def status(self):
+        """Version, origin and load time of the serving model, and its online-update state."""
+        model = self.recommender
+        return {
+            'model_version': model.model_version,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'drift': model.drift,
+            'absorbed_ratings': model.absorbed_ratings,
+            'refitting': self.refit_from is not None,
+        }
+
+    def update(self, ratings):
+        """Fold a frame of new ratings into the serving model; returns the User IDs updated."""
+        with self.lock:
+            model = copy.copy(self.recommender)
+            user_ids = model.update_ratings(ratings)
+            self.recommender = model
+            self.log.append(ratings)
+            if self.refit_from is None and self.refit_due():
+                self._start_refit()
+        return user_ids
+
+    def refit_due(self):
+        """Whether the serving model has drifted or aged past its refit policy."""
+        model = self.recommender
+        if not model.absorbed_ratings:
+            return False
+        if model.drift >= self.max_drift:
+            return True
+        return self.refit_interval is not None and time.time() - model.fitted_at >= self.refit_interval
+
+    def _start_refit(self):
+        self.refit_from = len(self.log)
+        self.thread = threading.Thread(
+            target=self._refit, args=(self.recommender, self.generation), daemon=True
+        )
+        self.thread.start()
+
+    def _refit(self, snapshot, generation):
+        model = copy.copy(snapshot)
+        refitted = False
+        start = time.perf_counter()
+        try:
+            model.refit()
+            refitted = True
+        finally:
+            with self.lock:
+                # A failed refit keeps serving the folded-in model, and a refit of a model
+                # that has since been swapped out is dropped
+                if generation == self.generation:
+                    if refitted:
+                        for ratings in self.log[self.refit_from:]:
+                            model.update_ratings(ratings)
+                        self._serve(model, 'refit', time.perf_counter() - start)
+                    self.refit_from = None
+
+    def wait(self):
+        """Block until a running refit has been swapped in."""
+        thread = self.thread
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,522 @@
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from artifacts import read_artifact, write_artifact
+from coalesce import SingleFlight
+from indexes import (
+    CategoryIndex, IdEncoder, InteractionStore, KeywordIndex, PostStore, build_interaction_matrix, csr_positions,
+    sample_from,
+)
+from metrics import stage
+from neighbors import ExactNeighbors, top_k, top_k_rows
+from trending import EVENT_WEIGHTS, TrendingIndex
+
+# Most recent posts of a user's history whose item neighbour lists are merged
+RECENT_POSTS = 50
+
+
+def data_version(*frames):
+    """Short content hash of the given DataFrames, used to version fitted models."""
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(','.join(map(str, frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+class Recommender:
+    """
+    A recommendation system that provides content-based, collaborative, 
+    and mood-based recommendations.
+    """
+    def __init__(self, posts_summary, rated_posts, interaction_tables=None, users_data=None,
+                 neighbor_index=ExactNeighbors, collaborative_mode='factors'):
+        self.posts_summary = posts_summary
+        self.rated_posts = rated_posts
+        # Factory for the user neighbour search, e.g. ExactNeighbors or IVFNeighbors
+        self.neighbor_index = neighbor_index
+        # 'factors' scores posts with user . item factor products, 'neighbors' counts
+        # the posts rated by the most similar users
+        self.collaborative_mode = collaborative_mode
+
+        # Lookup layer for request handling: Username -> User ID and Post ID -> post details
+        self.usernames = {} if users_data is None else dict(
+            zip(users_data['Username'], users_data['User ID'].tolist())
+        )
+        self.posts = PostStore(posts_summary)
+
+        # Inverted indexes from category_name / category_id to Post IDs, sampled by index draws
+        self.categories = CategoryIndex(posts_summary, 'category_name')
+        self.category_ids = CategoryIndex(posts_summary, 'category_id')
+        self.rng = np.random.default_rng()
+        # Concurrent identical collaborative and cold-start/category computations run once
+        self.flights = SingleFlight()
+
+        # Keyword similarity for content-based candidates, when the catalog carries keywords
+        self.keywords = KeywordIndex(posts_summary) if 'post_summary_keywords' in posts_summary else None
+        # Precomputed item neighbour table (item_neighbors.py), attached after loading
+        self.item_neighbors = None
+
+        # Group every interaction table by user once, so a user's history is a slice
+        interaction_tables = interaction_tables or {'rated': rated_posts}
+        self.interactions = InteractionStore(interaction_tables)
+
+        # Time-decayed popularity for the cold-start and category candidates; live events
+        # are recorded into it as they arrive
+        self.trending = TrendingIndex.build(posts_summary, interaction_tables)
+
+        # Version of the data this model is built from; artifacts derived from the model
+        # (such as materialized feeds) record it so stale ones can be detected
+        content_columns = ['Post ID', 'category_id', 'category_name']
+        if self.keywords is not None:
+            content_columns.append('post_summary_keywords')
+        self.model_version = data_version(
+            rated_posts, posts_summary[content_columns],
+            *interaction_tables.values(),
+            *([] if users_data is None else [users_data[['Username', 'User ID']]])
+        )
+
+        # Initialize collaborative filtering model using SVD
+        self.svd_model = None
+        self.create_svd_model()
+
+    def create_svd_model(self):
+        """Create an SVD model for collaborative filtering based on user ratings."""
+        # Imported here so workers that load a saved model never pay for importing scikit-learn
+        from sklearn.decomposition import TruncatedSVD
+
+        # Build a sparse user-item ratings matrix with stable User ID / Post ID encoders, and
+        # keep how many ratings each stored value averages so fold-ins can extend the means
+        self.ratings_matrix, self.user_encoder, self.post_encoder, self.rating_counts = build_interaction_matrix(
+            self.rated_posts, value_column='Rating Percent', return_counts=True
+        )
+
+        # Apply Truncated SVD to reduce dimensionality; it trains directly on the CSR matrix.
+        # A fixed seed makes a given model version always produce the same factors
+        svd = TruncatedSVD(n_components=20, random_state=0)
+        self.svd_model = svd.fit_transform(self.ratings_matrix)
+
+        # Store the transformed user feature matrix and the item factors (posts x components)
+        self.svd_matrix = np.ascontiguousarray(self.svd_model)
+        self.item_factors = np.ascontiguousarray(svd.components_.T)
+
+        # Index the user vectors for similar-user search, which only 'neighbors' mode queries
+        self.neighbors = self.neighbor_index(self.svd_matrix) if self.collaborative_mode == 'neighbors' else None
+
+        # Ratings the factors were fitted on; ratings folded in later are measured against it
+        self.fitted_ratings = len(self.rated_posts)
+        self.absorbed_ratings = 0
+        self.fitted_at = time.time()
+
+    @property
+    def rated_posts(self):
+        """Every rating: those the model was built from, then the ones folded in since."""
+        if self.new_ratings:
+            self._rated_posts = pd.concat([self._rated_posts, *self.new_ratings], ignore_index=True)
+            self.new_ratings = ()
+        return self._rated_posts
+
+    @rated_posts.setter
+    def rated_posts(self, rated_posts):
+        self._rated_posts = rated_posts
+        # Frames folded in by update_ratings, concatenated only when the whole table is read
+        self.new_ratings = ()
+
+    @property
+    def drift(self):
+        """Ratings folded in since the last fit, as a fraction of the ratings it was fitted on."""
+        return self.absorbed_ratings / max(self.fitted_ratings, 1)
+
+    def update_ratings(self, new_ratings):
+        """
+        Absorb new ratings (User ID, Post ID, Rating Percent rows) without refitting the SVD.
+
+        The item factors stay fixed and the users involved are folded in: their rows of the
+        ratings matrix are merged with the new ratings and projected onto the item factors
+        (r . V, which is what TruncatedSVD.transform computes), so new users get a latent
+        vector and existing users' vectors are recomputed. Every other user's vector is
+        unchanged. Ratings of posts the factors do not cover take effect at the next refit.
+        Returns the User IDs whose vectors changed.
+
+        The rating table is never rescanned: the users' stored ratings come from their rows
+        of the ratings matrix, which is spliced into new arrays. The user vectors and the
+        neighbour index, if built, are copied before the users' rows are rewritten, so
+        requests still running on the model this one was copied from never see them change.
+        """
+        new_ratings = new_ratings[['User ID', 'Post ID', 'Rating Percent']]
+        self.new_ratings = self.new_ratings + (new_ratings,)
+        self.absorbed_ratings += len(new_ratings)
+        user_ids = np.unique(new_ratings['User ID'].to_numpy(dtype=np.int64))
+        matrix, vectors, positions = self.ratings_matrix, self.svd_matrix, None
+        n_posts = len(self.post_encoder)
+
+        rows = self.user_encoder.encode(user_ids)
+        if (rows < 0).any():
+            # New users take their sorted positions among the existing ones, so existing rows
+            # of the ratings matrix and the user vectors move to their new positions
+            ids, added = self.user_encoder.ids, user_ids[rows < 0]
+            positions = np.arange(len(ids)) + np.searchsorted(added, ids)
+            self.user_encoder = IdEncoder.from_arrays({'ids': np.insert(ids, np.searchsorted(ids, added), added)})
+            lengths = np.zeros(len(self.user_encoder), dtype=np.int64)
+            lengths[positions] = np.diff(matrix.indptr)
+            matrix = sparse.csr_matrix(
+                (matrix.data, matrix.indices, np.concatenate(([0], np.cumsum(lengths)))),
+                shape=(len(self.user_encoder), n_posts),
+            )
+            vectors = np.zeros((len(self.user_encoder), self.item_factors.shape[1]), dtype=self.svd_matrix.dtype)
+            vectors[positions] = self.svd_matrix
+            rows = self.user_encoder.encode(user_ids)
+        else:
+            # The model this one was copied from (or its memory-mapped file) keeps the old vectors
+            vectors = vectors.copy()
+
+        # Merge the users' stored ratings (a mean and a count per post) with the new ones,
+        # so repeated (user, post) pairs are still averaged over every rating
+        stored = csr_positions(matrix.indptr, rows)
+        lengths = matrix.indptr[rows + 1] - matrix.indptr[rows]
+        columns = self.post_encoder.encode(new_ratings['Post ID'].to_numpy())
+        known = columns >= 0
+        keys, inverse = np.unique(np.concatenate([
+            np.repeat(rows, lengths) * n_posts + matrix.indices[stored],
+            self.user_encoder.encode(new_ratings['User ID'].to_numpy())[known] * n_posts + columns[known],
+        ]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.rating_counts[stored], np.ones(known.sum())]))
+        totals = np.bincount(inverse, weights=np.concatenate([
+            matrix.data[stored] * self.rating_counts[stored],
+            new_ratings['Rating Percent'].to_numpy(dtype=np.float64)[known],
+        ]))
+
+        # Splice the merged rows into copies of the CSR arrays in place of the stored ones
+        merged_rows, merged_columns = np.divmod(keys, n_posts)
+        merged_lengths = np.bincount(np.searchsorted(rows, merged_rows), minlength=len(rows))
+        kept = np.ones(len(matrix.data), dtype=bool)
+        kept[stored] = False
+        at = np.repeat(matrix.indptr[rows] - np.concatenate(([0], np.cumsum(lengths)[:-1])), merged_lengths)
+        row_lengths = np.diff(matrix.indptr)
+        row_lengths[rows] = merged_lengths
+        self.ratings_matrix = sparse.csr_matrix((
+            np.insert(matrix.data[kept], at, totals / counts),
+            np.insert(matrix.indices[kept], at, merged_columns.astype(matrix.indices.dtype)),
+            np.concatenate(([0], np.cumsum(row_lengths))),
+        ), shape=matrix.shape)
+        self.rating_counts = np.insert(self.rating_counts[kept], at, counts)
+
+        vectors[rows] = self.ratings_matrix[rows] @ self.item_factors
+        self.svd_model = self.svd_matrix = vectors
+        if self.neighbors is not None:
+            self.neighbors = self.neighbors.update(vectors, rows, positions)
+        return user_ids.tolist()
+
+    def refit(self):
+        """Refit the SVD on every rating so far, including the folded-in ones."""
+        if self.absorbed_ratings:
+            # The new fit is versioned by the model it replaces and the ratings it absorbed
+            self.model_version = data_version(
+                pd.DataFrame({'model_version': [self.model_version]}),
+                self.rated_posts.iloc[-self.absorbed_ratings:],
+            )
+        self.create_svd_model()
+
+    def save(self, path):
+        """Write the fitted factors, ID encoders and lookup indexes to an artifact directory."""
+        components = {
+            'users': {
+                'usernames': np.asarray(list(self.usernames), dtype=str),
+                'user_ids': np.asarray(list(self.usernames.values()), dtype=np.int64),
+            },
+            'posts': self.posts.to_arrays(),
+            'categories': self.categories.to_arrays(),
+            'category_ids': self.category_ids.to_arrays(),
+            **({} if self.trending is None else {'trending': self.trending.to_arrays()}),
+            **({} if self.keywords is None else {'keywords': self.keywords.to_arrays()}),
+            'interactions': self.interactions.to_arrays(),
+            'user_encoder': self.user_encoder.to_arrays(),
+            'post_encoder': self.post_encoder.to_arrays(),
+            'ratings': {
+                'data': self.ratings_matrix.data,
+                'indices': self.ratings_matrix.indices,
+                'indptr': self.ratings_matrix.indptr,
+                'counts': self.rating_counts,
+            },
+            'factors': {'users': self.svd_matrix, 'items': self.item_factors},
+            'rated_posts': {
+                column.lower().replace(' ', '_'): self.rated_posts[column].to_numpy()
+                for column in ('User ID', 'Post ID', 'Rating Percent')
+            },
+        }
+        write_artifact(path, components, {
+            'model_version': self.model_version,
+            'collaborative_mode': self.collaborative_mode,
+            'interaction_kinds': list(self.interactions.indices),
+            'fitted_ratings': self.fitted_ratings,
+            'absorbed_ratings': self.absorbed_ratings,
+            'fitted_at': self.fitted_at,
+        })
+
+    @classmethod
+    def load(cls, path, neighbor_index=ExactNeighbors):
+        """
+        Rebuild a Recommender from an artifact written by `save`, without reading the CSVs
+        or refitting. Arrays are memory-mapped; only the dict lookups are rebuilt.
+        """
+        components, manifest = read_artifact(path)
+        recommender = cls.__new__(cls)
+        recommender.posts_summary = None
+        recommender.rated_posts = pd.DataFrame({
+            column: components['rated_posts'][column.lower().replace(' ', '_')]
+            for column in ('User ID', 'Post ID', 'Rating Percent')
+        })
+        recommender.neighbor_index = neighbor_index
+        recommender.collaborative_mode = manifest['collaborative_mode']
+        recommender.model_version = manifest['model_version']
+
+        users = components['users']
+        recommender.usernames = dict(zip(users['usernames'].tolist(), users['user_ids'].tolist()))
+        recommender.posts = PostStore.from_arrays(components['posts'])
+        recommender.categories = CategoryIndex.from_arrays(components['categories'])
+        recommender.category_ids = CategoryIndex.from_arrays(components['category_ids'])
+        recommender.trending = TrendingIndex.from_arrays(components['trending']) if 'trending' in components else None
+        recommender.keywords = KeywordIndex.from_arrays(components['keywords']) if 'keywords' in components else None
+        recommender.item_neighbors = None
+        recommender.rng = np.random.default_rng()
+        recommender.flights = SingleFlight()
+        recommender.interactions = InteractionStore.from_arrays(
+            components['interactions'], manifest['interaction_kinds']
+        )
+
+        recommender.user_encoder = IdEncoder.from_arrays(components['user_encoder'])
+        recommender.post_encoder = IdEncoder.from_arrays(components['post_encoder'])
+        ratings = components['ratings']
+        recommender.ratings_matrix = sparse.csr_matrix(
+            (ratings['data'], ratings['indices'], ratings['indptr']),
+            shape=(len(recommender.user_encoder), len(recommender.post_encoder)),
+        )
+        recommender.rating_counts = ratings['counts'] if 'counts' in ratings else np.ones(len(ratings['data']))
+        recommender.svd_model = components['factors']['users']
+        recommender.svd_matrix = components['factors']['users']
+        recommender.item_factors = components['factors']['items']
+        recommender.neighbors = (
+            neighbor_index(recommender.svd_matrix) if recommender.collaborative_mode == 'neighbors' else None
+        )
+        recommender.fitted_ratings = manifest.get('fitted_ratings', len(recommender.rated_posts))
+        recommender.absorbed_ratings = manifest.get('absorbed_ratings', 0)
+        recommender.fitted_at = manifest.get('fitted_at', time.time())
+        return recommender
+
+    def content_based(self, user_posts, n=10, user_id=None):
+        """
+        Generate recommendations based on the content of posts the user has interacted with.
+        With an item neighbour table attached, the neighbour lists of the RECENT_POSTS
+        posts `user_id` interacted with most recently are merged; otherwise the posts whose
+        keywords are most similar to the user's profile are scored on the spot. The
+        profile sums the keyword vectors of their posts, each weighted by what `user_id`
+        did with it (EVENT_WEIGHTS summed over their interactions, so an inspired post
+        counts four times a view). Without `user_id`, `user_posts` is taken to be in time
+        order and every post counts once. Without keyword data, or when too few posts
+        are similar, the rest are sampled from the same categories.
+        """
+        if not user_posts:
+            return []
+
+        if self.item_neighbors is not None:
+            if user_id is not None:
+                recent = self.interactions.recent_posts(user_id, RECENT_POSTS)
+            else:
+                recent = user_posts[-RECENT_POSTS:]
+            recommendations = self.item_neighbors.merge(recent, n, user_posts)
+        elif self.keywords is not None:
+            weights = None
+            if user_id is not None:
+                weights = self.interactions.post_weights(user_id, user_posts, EVENT_WEIGHTS)
+            recommendations = self.keywords.similar(user_posts, n, weights)
+        else:
+            recommendations = []
+        if len(recommendations) < n:
+            # Identify categories of the user's interacted posts
+            categories = self.posts.values('category_name', user_posts)
+
+            # Recommend posts from the same categories
+            seen = set(recommendations)
+            recommendations += [
+                post for post in self.categories.sample(categories, n, self.rng) if post not in seen
+            ][:n - len(recommendations)]
+        return recommendations
+
+    def collaborative(self, user_id):
+        """
+        Generate recommendations using collaborative filtering with SVD.
+        Recommends posts based on similar users' interactions.
+        """
+        return self._coalesced(('collaborative', id(self), user_id), lambda: self.collaborative_batch([user_id])[0])
+
+    def _coalesced(self, key, function):
+        """
+        Run `function`, sharing the result with concurrent calls of the same key. Keys
+        include id(self): model copies share `flights` but not their results.
+        """
+        if self.flights is None:
+            return function()
+        return self.flights.do(key, function)
+
+    def collaborative_batch(self, user_ids, k=5, block_size=1024):
+        """
+        Collaborative recommendations for a whole block of users; element i is exactly what
+        collaborative(user_ids[i]) returns. Users missing from the fitted model get [].
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        results = [[] for _ in user_ids]
+        if self.svd_model is None:
+            return results
+
+        rows = self.user_encoder.encode(user_ids)
+        known = np.flatnonzero(rows >= 0)
+        if self.collaborative_mode != 'factors':
+            for i in known:
+                results[i] = self.collaborative_neighbors(rows[i])
+            return results
+
+        # Score users in blocks to bound the (users x posts) score matrix
+        for start in range(0, len(known), block_size):
+            block = known[start:start + block_size]
+            for i, posts in zip(block, self.collaborative_factors(user_ids[block], rows[block], k)):
+                results[i] = posts
+        return results
+
+    def collaborative_neighbors(self, user_idx):
+        """Recommend the posts rated most often by the users most similar to the user."""
+        if self.neighbors is None:
+            self.neighbors = self.neighbor_index(self.svd_matrix)
+
+        # Find the most similar users to the user's feature vector, excluding the user
+        similar_rows = self.neighbors.query(self.svd_matrix[user_idx], 4, exclude=user_idx)  # Top 4 similar users
+
+        # Count the similar users' ratings of each post from their rows of the ratings matrix
+        positions = csr_positions(self.ratings_matrix.indptr, similar_rows)
+        posts, inverse = np.unique(self.ratings_matrix.indices[positions], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.rating_counts[positions], minlength=len(posts))
+        return self.post_encoder.decode(posts[top_k(counts, 5)]).tolist()
+
+    def collaborative_factors(self, user_ids, user_rows, k=5):
+        """
+        Score every rated post for a block of users with a single product of their vectors
+        and the SVD item factors, and return each user's top-k posts not interacted with yet.
+        """
+        scores = self.svd_matrix[user_rows] @ self.item_factors.T
+
+        # Exclude posts the users have already rated or otherwise interacted with
+        ratings = self.ratings_matrix[user_rows]
+        scores[np.repeat(np.arange(len(user_rows)), np.diff(ratings.indptr)), ratings.indices] = -np.inf
+        for row, user_id in enumerate(user_ids):
+            seen = self.post_encoder.encode(self.interactions.user_posts(user_id))
+            scores[row, seen[seen >= 0]] = -np.inf
+
+        best = top_k_rows(scores, k)
+        return [
+            self.post_encoder.decode(columns[np.isfinite(row_scores[columns])]).tolist()
+            for columns, row_scores in zip(best, scores)
+        ]
+
+    def cold_start(self, mood):
+        """
+        Handle recommendations for new users based on their mood.
+        Moods are mapped to specific categories of posts; 10 of the category's trending
+        posts are sampled, or of the trending posts overall when no post has that category.
+        """
+        mood_map = {
+            'happy': 'Motivational/Self-help',
+            'sad': 'Emotional Narrative',
+            'neutral': 'Philosophical Exploration'
+        }
+        category = mood_map.get(mood, 'Philosophical Exploration')
+
+        if self.trending is not None:
+            trending = self.trending.top(self.trending.category_id(category))
+            return sample_from([np.asarray(trending)], 10, self.rng)
+
+        # Fallback to random posts if no category posts are available
+        if category not in self.categories:
+            return sample_from([self.posts.ids], 10, self.rng)
+
+        # Get posts in the mood's corresponding category
+        return self.categories.sample([category], 10, self.rng)
+
+    def personal_candidates(self, user_id, user_posts, collaborative=None):
+        """
+        Candidate posts that depend only on the user and the fitted model: content-based
+        and collaborative recommendations. Precomputed collaborative recommendations can
+        be passed in to skip that stage.
+        """
+        recommendations = []
+
+        # Add content-based recommendations
+        with stage('content_based'):
+            recommendations += self.content_based(user_posts, user_id=user_id)
+
+        # Add collaborative recommendations
+        if collaborative is None:
+            with stage('collaborative'):
+                collaborative = self.collaborative(user_id)
+        recommendations += collaborative
+
+        return recommendations
+
+    def request_candidates(self, mood, category_id):
+        """Candidate posts driven by the request parameters: mood and category."""
+        recommendations = []
+
+        # Add cold-start recommendations if a mood is specified
+        if mood:
+            with stage('cold_start'):
+                recommendations += self._coalesced(('cold_start', id(self), mood), lambda: self.cold_start(mood))
+
+        # Add category-based recommendations if a category is specified
+        if category_id:
+            category_id = int(category_id)
+            with stage('category'):
+                recommendations += self._coalesced(
+                    ('category', id(self), category_id), lambda: self.category_candidates(category_id)
+                )
+
+        return recommendations
+
+    def category_candidates(self, category_id):
+        """The category's top 10 trending posts, or its first 10 in catalog order without a trending index."""
+        if self.trending is not None:
+            return self.trending.top(category_id, 10)
+        return self.category_ids.get(category_id)[:10].tolist()
+
+    def hybrid_candidates(self, user_id, user_posts, mood, category_id, collaborative=None):
+        """Collect the candidate posts of every strategy before the final random mix."""
+        return (self.personal_candidates(user_id, user_posts, collaborative)
+                + self.request_candidates(mood, category_id))
+
+    def mix(self, recommendations, n=10):
+        """Deduplicate and randomize the final list of up to `n` posts."""
+        if not recommendations:
+            return []
+        with stage('mix'):
+            return list(set(self.rng.choice(recommendations, min(n, len(recommendations)), replace=False).tolist()))
+
+    def hybrid_recommendations(self, user_id, user_posts, mood, category_id):
+        """
+        Combine content-based, collaborative, and cold-start recommendations into a hybrid model.
+        """
+        return self.mix(self.hybrid_candidates(user_id, user_posts, mood, category_id))
+
+    def recommend_batch(self, user_ids, mood=None, category_id=None):
+        """
+        Hybrid recommendations for many users at once. Collaborative scoring and top-k run
+        as block matrix operations; the per-user result matches hybrid_recommendations.
+        """
+        with stage('collaborative_batch'):
+            collaborative = self.collaborative_batch(user_ids)
+        return [
+            self.mix(self.hybrid_candidates(
+                user_id, self.interactions.user_posts(user_id), mood, category_id, user_collaborative
+            ))
+            for user_id, user_collaborative in zip(user_ids, collaborative)
+        ]
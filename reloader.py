@@ -0,0 +1,107 @@
+import threading
+import time
+
+from artifacts import MODELS_DIR, latest_version
+from train import load_model, train
+
+# Seconds between checks for a newly published model
+POLL_INTERVAL = 30.0
+
+
+class ModelReloader:
+    """
+    Background thread that swaps new models into a running app without a restart.
+
+    Every `interval` seconds it checks MODELS_DIR/LATEST; when another version has been
+    published (for example by `python train.py`), the artifact is loaded on this thread,
+    off the request path, and handed to `updater.swap`. `reload(retrain=True)` instead
+    fits a new model from the source tables. Requests hold on to the model they started
+    with, so in-flight requests finish on the old one. `prepare(recommender)` runs before
+    each swap, e.g. to attach tables the new model must serve with from its first
+    request, and `on_swap(recommender)` after it, e.g. to reload the materialized feeds
+    of the new version.
+    """
+    def __init__(self, updater, models_dir=MODELS_DIR, interval=POLL_INTERVAL, prepare=None, on_swap=None):
+        self.updater = updater
+        self.models_dir = models_dir
+        self.interval = interval
+        self.prepare = prepare
+        self.on_swap = on_swap
+        # The published version last acted on; the startup model already covers it
+        self.published = latest_version(models_dir)
+        self.error = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def check(self):
+        """Load and swap in the published model if it changed; returns whether it swapped."""
+        version = latest_version(self.models_dir)
+        if version is None or version == self.published:
+            return False
+        start = time.perf_counter()
+        recommender = load_model(self.models_dir, version)
+        self.published = version
+        self._swap(recommender, f'artifact {version}', time.perf_counter() - start)
+        return True
+
+    def reload(self, retrain=False):
+        """Swap in the published model, or a model freshly trained on the source tables."""
+        with self.lock:
+            return self._reload(retrain)
+
+    def reload_async(self, retrain=False):
+        """Run `reload` on its own thread; returns False if a reload is already running."""
+        # The lock is taken here and released by the thread, so two callers cannot both start one
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            threading.Thread(target=self._reload_and_release, args=(retrain,), daemon=True).start()
+        except BaseException:
+            self.lock.release()
+            raise
+        return True
+
+    def _reload_and_release(self, retrain):
+        try:
+            self._reload(retrain)
+        finally:
+            self.lock.release()
+
+    def _reload(self, retrain):
+        try:
+            if not retrain:
+                return self.check()
+            start = time.perf_counter()
+            recommender = train()
+            self._swap(recommender, 'trained', time.perf_counter() - start)
+            return True
+        except Exception as error:
+            # Keep serving the current model; the failure is reported by status()
+            self.error = f'{type(error).__name__}: {error}'
+            return False
+
+    def _swap(self, recommender, source, load_seconds):
+        if self.prepare is not None:
+            self.prepare(recommender)
+        self.updater.swap(recommender, source, load_seconds)
+        self.error = None
+        if self.on_swap is not None:
+            self.on_swap(recommender)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._poll, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _poll(self):
+        while not self.stopped.wait(self.interval):
+            self.reload()
+
+    def status(self):
+        """The serving model's status plus the reloader's own state."""
+        return dict(self.updater.status(), published_version=self.published,
+                    reloading=self.lock.locked(), reload_error=self.error)
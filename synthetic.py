@@ -0,0 +1,293 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as arrow_csv
+
+from data import INTERACTIONS, SCHEMAS, TABLE_FILES, apply_schema
+
+# Column order of every source CSV, as the loaders and the API ingestion write them
+COLUMNS = {
+    'viewed_posts': ['Post ID', 'User ID', 'Viewed At'],
+    'liked_posts': ['Post ID', 'User ID', 'Liked At'],
+    'rated_posts': ['Post ID', 'User ID', 'Rating Percent', 'Rated At'],
+    'inspired_posts': ['Post ID', 'User ID', 'Inspired At'],
+    'users_data': ['User ID', 'Username', 'Role', 'Share Count', 'Post Count', 'Following Count', 'Follower Count'],
+    'posts_summary': [
+        'average_rating', 'bookmarked', 'category_count', 'category_description', 'category_id',
+        'category_name', 'comment_count', 'created_at', 'exit_count', 'following', 'Post ID',
+        'post_summary_genre', 'rating_count', 'share_count', 'slug', 'title', 'upvote_count', 'upvoted',
+        'view_count', 'post_summary_keywords', 'post_summary_description',
+    ],
+}
+
+# Row counts of the shipped tables; --scale multiplies all of them
+SHIPPED_ROWS = {
+    'viewed_posts': 1000,
+    'liked_posts': 1000,
+    'rated_posts': 2881,
+    'inspired_posts': 264,
+    'users_data': 1277,
+    'posts_summary': 1136,
+}
+
+# Categories of the shipped catalog with their post counts, which set the category skew
+CATEGORIES = [
+    (2, 'Vible', 'All the best vibes!', 531),
+    (4, 'E/ACC', 'Accelerate human abundance', 208),
+    (6, 'InstaRama', 'Embrace your journey towards growth & self-discovery', 171),
+    (8, 'Bloom Scroll', 'Scroll until you bloom', 58),
+    (0, 'Not Available', 'Not Available', 58),
+    (22, 'SolTok', 'Ride the wave of Solana with SolTok', 50),
+    (13, 'Flic', 'Where Creativity Meets Opportunity', 20),
+    (21, 'Pumptok', 'Learn more about tokens!', 19),
+    (3, 'The Igloo', 'A web3-born brand that fosters creativity, freedom, and community', 7),
+    (20, 'OvaDrive', 'Unlock The Power Of Your 2nd Brain', 7),
+    (5, 'Gratitube', 'Accelerating gratitude, positivity & appreciation', 3),
+    (18, 'Startup College', 'Unlocking the highest path', 1),
+    (11, 'Stop Scrolling', 'Scroll with the goal of stopping', 1),
+    (10, 'Digital Coffee', 'Media that gives you a buzz', 1),
+    (26, 'Bot', 'Bot', 1),
+]
+
+# Most common summary genres of the shipped catalog with their post counts
+GENRES = [
+    ('Motivational/Inspirational', 77), ('Not Available', 48), ('Educational/Instructional', 28),
+    ('Inspirational/Spiritual', 24), ('Spiritual/Religious', 20), ('Educational/Inspirational', 19),
+    ('Educational/Informative', 19), ('Spiritual/Inspirational', 19), ('Educational', 16), ('Motivational', 14),
+]
+
+# Popularity skew: rank = n * u ** SKEW for uniform u, a power law with density ~ x^(1/SKEW - 1).
+# With these exponents the top 1% of posts get ~30% of interactions and the top 1% of users ~10%
+POST_SKEW = 4.0
+USER_SKEW = 2.0
+
+# Keywords per post, drawn from a per-category vocabulary of KEYWORD_VOCABULARY terms
+KEYWORDS_PER_POST = 8
+KEYWORD_VOCABULARY = 200
+
+# Interaction timestamps span the shipped data's range
+START = pd.Timestamp('2023-10-24').value // 10 ** 9
+END = pd.Timestamp('2024-12-10').value // 10 ** 9
+
+# Rows generated per chunk; memory stays bounded by the chunk size whatever the table size
+CHUNK_ROWS = 1_000_000
+
+
+def _coprime_multiplier(n, start=2654435761):
+    """A multiplier coprime to n, so (rank * m) % n is a permutation of range(n)."""
+    multiplier = start % max(n, 1) or 1
+    while math.gcd(multiplier, n) != 1:
+        multiplier += 1
+    return multiplier
+
+
+class SyntheticDataset:
+    """
+    Synthetic source tables with the exact columns of the shipped CSVs, generated chunk
+    by chunk from a seed.
+
+    Interactions pick posts and users by power-law rank, scattered over the ID space
+    with a fixed permutation so popular posts are not simply the lowest IDs. Posts draw
+    their category with the shipped catalog's skew and their keywords from a
+    per-category vocabulary. Interaction timestamps increase through each table, like
+    the API listings. The same seed and sizes always produce the same rows.
+    """
+    def __init__(self, rows, seed=0, chunk_rows=CHUNK_ROWS):
+        self.rows = rows
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.n_users = rows['users_data']
+        self.n_posts = rows['posts_summary']
+        self.user_multiplier = _coprime_multiplier(self.n_users)
+        self.post_multiplier = _coprime_multiplier(self.n_posts)
+
+        ids, names, descriptions, counts = zip(*CATEGORIES)
+        self.category_ids = np.array(ids, dtype=np.int64)
+        self.category_names = np.array(names)
+        self.category_descriptions = np.array(descriptions)
+        self.category_weights = np.array(counts, dtype=np.float64) / sum(counts)
+        genre_weights = np.array([count for _, count in GENRES], dtype=np.float64)
+        self.genre_weights = genre_weights / genre_weights.sum()
+
+    @classmethod
+    def scaled(cls, scale, seed=0, chunk_rows=CHUNK_ROWS):
+        """A dataset with `scale` times the rows of every shipped table."""
+        return cls({name: round(rows * scale) for name, rows in SHIPPED_ROWS.items()}, seed, chunk_rows)
+
+    def _rng(self, name, chunk):
+        # An independent stream per (table, chunk), so chunks can be generated in any order
+        return np.random.default_rng([self.seed, list(TABLE_FILES).index(name), chunk])
+
+    def _ranked_ids(self, rng, n_rows, n_ids, skew, multiplier):
+        ranks = (n_ids * rng.random(n_rows) ** skew).astype(np.int64)
+        return ranks * multiplier % n_ids + 1
+
+    def _spans(self, rows, chunk_rows):
+        for chunk, start in enumerate(range(0, rows, chunk_rows)):
+            yield chunk, start, min(start + chunk_rows, rows)
+
+    def interaction_chunks(self, name):
+        """DataFrames of interaction table `name` in order, CHUNK_ROWS rows at a time."""
+        total = self.rows[name]
+        timestamp = INTERACTIONS[name]
+        for chunk, start, end in self._spans(total, self.chunk_rows):
+            rng = self._rng(name, chunk)
+            n = end - start
+            frame = pd.DataFrame({
+                'Post ID': self._ranked_ids(rng, n, self.n_posts, POST_SKEW, self.post_multiplier),
+                'User ID': self._ranked_ids(rng, n, self.n_users, USER_SKEW, self.user_multiplier),
+            })
+            if name == 'rated_posts':
+                # Right-skewed like the shipped ratings (median around 20%)
+                frame['Rating Percent'] = np.clip(rng.gamma(2.0, 13.0, n) + 1, 1, 100).astype(np.int64)
+            # This chunk's share of the time range, so timestamps increase through the table
+            low = START + (END - START) * start / total
+            high = START + (END - START) * end / total
+            frame[timestamp] = np.sort(rng.uniform(low, high, n)).astype('int64').astype('datetime64[s]')
+            yield frame[COLUMNS[name]]
+
+    def users_chunks(self):
+        """DataFrames of the users table in User ID order."""
+        for chunk, start, end in self._spans(self.n_users, self.chunk_rows):
+            rng = self._rng('users_data', chunk)
+            n = end - start
+            user_ids = np.arange(start + 1, end + 1)
+            # Most users never post or follow; a few are very active
+            active = rng.random(n) < 0.05
+            yield pd.DataFrame({
+                'User ID': user_ids,
+                'Username': [f'user{user_id}' for user_id in user_ids.tolist()],
+                'Role': np.where(rng.random(n) < 0.004, 'A', 'U'),
+                'Share Count': np.zeros(n, dtype=np.int64),
+                'Post Count': (rng.pareto(1.2, n) * 5 * active).astype(np.int64),
+                'Following Count': (rng.pareto(1.5, n) * 2 * active).astype(np.int64),
+                'Follower Count': (rng.pareto(1.5, n) * 2 * active).astype(np.int64),
+            })[COLUMNS['users_data']]
+
+    def posts_chunks(self):
+        """DataFrames of the post catalog in Post ID order, with JSON keyword lists."""
+        # Keyword rows are long strings, so posts are generated in smaller chunks
+        for chunk, start, end in self._spans(self.n_posts, max(self.chunk_rows // 10, 1)):
+            rng = self._rng('posts_summary', chunk)
+            n = end - start
+            post_ids = np.arange(start + 1, end + 1)
+            categories = rng.choice(len(CATEGORIES), n, p=self.category_weights)
+            names = self.category_names
+            terms = (KEYWORD_VOCABULARY * rng.random((n, KEYWORDS_PER_POST)) ** 2).astype(np.int64)
+            keywords = [
+                '[' + ', '.join(
+                    f'{{"keyword": "{names[category].lower()} topic {term}", "weight": {10 - position}}}'
+                    for position, term in enumerate(dict.fromkeys(row))
+                ) + ']'
+                for category, row in zip(categories.tolist(), terms.tolist())
+            ]
+            views = (rng.pareto(2.0, n) * 40).astype(np.int64)
+            # Share of the catalog in each post's category, as the API reports it
+            category_count = np.round(self.category_weights[categories] * self.n_posts)
+            created = START + (END - START) * (start + np.sort(rng.random(n)) * n) / self.n_posts
+            yield pd.DataFrame({
+                'average_rating': np.where(rng.random(n) < 0.4, rng.integers(1, 101, n), 0),
+                'bookmarked': rng.random(n) < 0.1,
+                'category_count': category_count,
+                'category_description': self.category_descriptions[categories],
+                'category_id': self.category_ids[categories],
+                'category_name': names[categories],
+                'comment_count': rng.poisson(0.25, n),
+                'created_at': (created * 1000).astype(np.int64),
+                'exit_count': (rng.pareto(1.5, n) * 10).astype(np.int64),
+                'following': rng.random(n) < 0.5,
+                'Post ID': post_ids,
+                'post_summary_genre': np.array([genre for genre, _ in GENRES])[
+                    rng.choice(len(GENRES), n, p=self.genre_weights)
+                ],
+                'rating_count': rng.poisson(2.5, n),
+                'share_count': rng.poisson(0.2, n),
+                'slug': [f'synthetic-post-{post_id}' for post_id in post_ids.tolist()],
+                'title': [f'Synthetic post {post_id}' for post_id in post_ids.tolist()],
+                'upvote_count': (views * rng.uniform(0.2, 0.6, n)).astype(np.int64),
+                'upvoted': rng.random(n) < 0.5,
+                'view_count': views,
+                'post_summary_keywords': keywords,
+                'post_summary_description': [
+                    f'Synthetic video in the {names[category]} category.' for category in categories.tolist()
+                ],
+            })[COLUMNS['posts_summary']]
+
+    def chunks(self, name):
+        if name == 'users_data':
+            return self.users_chunks()
+        if name == 'posts_summary':
+            return self.posts_chunks()
+        return self.interaction_chunks(name)
+
+    def tables(self, names=None):
+        """
+        Every table (or `names`) as one in-memory DataFrame with the column types of
+        data.load_tables; for sizes that fit in memory.
+        """
+        return {
+            name: apply_schema(pd.concat(self.chunks(name), ignore_index=True), SCHEMAS[name])
+            for name in names or TABLE_FILES
+        }
+
+    def write(self, output_dir, names=None):
+        """
+        Stream each table to its CSV file (named as in data.TABLE_FILES) under `output_dir`,
+        one chunk in memory at a time. Yields (name, rows) as each file is completed.
+        """
+        # Interaction and user rows are plain numbers, timestamps and identifiers, which
+        # Arrow's CSV writer formats several times faster than pandas; post rows carry
+        # free text and floats, so pandas writes them to match the shipped files exactly
+        plain = arrow_csv.WriteOptions(include_header=False, quoting_style='none')
+        os.makedirs(output_dir, exist_ok=True)
+        for name in names or TABLE_FILES:
+            path = os.path.join(output_dir, TABLE_FILES[name])
+            rows = 0
+            with open(path + '.tmp', 'wb') as file:
+                file.write((','.join(COLUMNS[name]) + '\n').encode())
+                for frame in self.chunks(name):
+                    if name == 'posts_summary':
+                        frame.to_csv(file, header=False, index=False, lineterminator='\n', encoding='utf-8')
+                    else:
+                        arrow_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), file, plain)
+                    rows += len(frame)
+            os.replace(path + '.tmp', path)
+            yield name, rows
+
+
+def main():
+    """Write synthetic source CSVs with the shipped schemas, scaled up from the shipped row counts."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--scale', type=float, default=100, help='multiplier for every shipped table size')
+    parser.add_argument('--users', type=int, help='override the number of users')
+    parser.add_argument('--posts', type=int, help='override the number of posts')
+    parser.add_argument('--interactions', type=int,
+                        help='override the total interactions, split across tables like the shipped data')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--output-dir', default='synthetic')
+    args = parser.parse_args()
+
+    rows = {name: round(count * args.scale) for name, count in SHIPPED_ROWS.items()}
+    if args.users:
+        rows['users_data'] = args.users
+    if args.posts:
+        rows['posts_summary'] = args.posts
+    if args.interactions:
+        shipped = sum(SHIPPED_ROWS[name] for name in INTERACTIONS)
+        rows.update({name: round(args.interactions * SHIPPED_ROWS[name] / shipped) for name in INTERACTIONS})
+
+    start = time.perf_counter()
+    dataset = SyntheticDataset(rows, args.seed, args.chunk_rows)
+    for name, count in dataset.write(args.output_dir):
+        print(f"Wrote {count} rows to {os.path.join(args.output_dir, TABLE_FILES[name])}")
+    print(f"Generated {sum(rows.values())} rows in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Request validation of the Flask routes that take JSON bodies: malformed input gets a 400
+or is rejected item by item, never a 500 or a write into the model.
+"""
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app():
+    # Imported here: importing the app loads or trains its startup model
+    import app
+    app.reloader.stop()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+
+@pytest.fixture
+def username(app):
+    recommender = app.updater.recommender
+    rated = set(recommender.user_encoder.ids.tolist())
+    return next(name for name, user_id in recommender.usernames.items() if user_id in rated)
+
+
+@pytest.mark.parametrize('body', [[1], {'usernames': 'abc'}, {'usernames': [1, 2]}, {'usernames': ['a', None]}])
+def test_feed_batch_rejects_malformed_usernames(client, body):
+    response = client.post('/feed/batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_feed_batch_reports_unknown_usernames(client, username):
+    response = client.post('/feed/batch', json={'usernames': [f' {username} ', 'nobody']})
+    assert response.status_code == 200
+    assert list(response.json['feeds']) == [username]
+    assert response.json['not_found'] == ['nobody']
+
+
+@pytest.mark.parametrize('body', [[1], {'ratings': 'abc'}, {'ratings': {'username': 'a'}}, {'ratings': [1]}])
+def test_ratings_rejects_malformed_bodies(app, client, body):
+    model = app.updater.recommender
+    response = client.post('/ratings', json=body)
+    assert response.status_code == 400
+    assert app.updater.recommender is model
+
+
+def test_ratings_rejects_invalid_entries(app, client, username):
+    post_id = int(app.updater.recommender.posts.ids[0])
+    invalid = [
+        {'username': username, 'post_id': True, 'rating_percent': 50},
+        {'username': username, 'post_id': post_id, 'rating_percent': True},
+        {'username': username, 'post_id': str(post_id), 'rating_percent': 50},
+        {'username': username, 'post_id': post_id, 'rating_percent': 101},
+        {'username': username, 'post_id': post_id, 'rating_percent': -1},
+        {'username': username, 'post_id': post_id},
+        {'username': 7, 'post_id': post_id, 'rating_percent': 50},
+        {'username': 'nobody', 'post_id': post_id, 'rating_percent': 50},
+    ]
+    model = app.updater.recommender
+    response = client.post('/ratings', json={'ratings': invalid})
+    assert response.status_code == 200
+    assert response.json['updated_users'] == 0
+    assert response.json['rejected'] == invalid
+    assert app.updater.recommender is model
+
+    response = client.post('/ratings', json={'ratings': [{'username': username, 'post_id': post_id,
+                                                           'rating_percent': 80}]})
+    assert response.json['updated_users'] == 1 and response.json['rejected'] == []
+
+
+def test_reload_does_not_retrain_over_http(client):
+    response = client.post('/admin/reload', json={'retrain': True})
+    assert response.status_code == 400
+    assert 'error' in response.json
@@ -0,0 +1,59 @@
+"""
+Directory swaps (artifacts.replace_directory): a path always resolves to one complete
+version, and superseded versions are cleaned up.
+"""
+import os
+
+import numpy as np
+
+from artifacts import read_artifact, replace_directory, resolve, write_artifact
+
+
+def stage(tmp_path, name, version):
+    staging = tmp_path / f'{name}.tmp-{os.getpid()}'
+    staging.mkdir()
+    for file in ('a.txt', 'b.txt'):
+        (staging / file).write_text(version)
+    return str(staging)
+
+
+def versions(tmp_path, name):
+    return sorted(entry for entry in os.listdir(tmp_path) if entry.startswith(f'{name}.'))
+
+
+def test_swaps_keep_one_previous_version(tmp_path):
+    path = str(tmp_path / 'feeds')
+    for version in ('1', '2', '3'):
+        before = resolve(path) if os.path.exists(path) else None
+        replace_directory(stage(tmp_path, 'feeds', version), path)
+        assert os.path.islink(path)
+        assert {(tmp_path / 'feeds' / file).read_text() for file in ('a.txt', 'b.txt')} == {version}
+        # A reader that resolved the link before the swap can still finish reading
+        if before is not None:
+            assert open(os.path.join(before, 'b.txt')).read() == str(int(version) - 1)
+
+    # The current version and the one it replaced, nothing else
+    assert len(versions(tmp_path, 'feeds')) == 2
+
+
+def test_plain_directory_is_replaced(tmp_path):
+    path = tmp_path / 'feeds'
+    path.mkdir()
+    (path / 'a.txt').write_text('old')
+    replace_directory(stage(tmp_path, 'feeds', 'new'), str(path))
+    assert (path / 'a.txt').read_text() == 'new'
+    replace_directory(stage(tmp_path, 'feeds', 'newer'), str(path))
+    replace_directory(stage(tmp_path, 'feeds', 'newest'), str(path))
+    assert (path / 'a.txt').read_text() == 'newest'
+    assert len(versions(tmp_path, 'feeds')) == 2
+
+
+def test_rewritten_artifact_is_always_readable(tmp_path):
+    path = str(tmp_path / 'abc123')
+    write_artifact(path, {'factors': {'users': np.arange(3)}}, {'model_version': 'abc123'})
+    components, _ = read_artifact(path)
+    write_artifact(path, {'factors': {'users': np.arange(5)}}, {'model_version': 'abc123'})
+
+    # Arrays mapped from the replaced version stay readable; new reads see the new one
+    assert components['factors']['users'].tolist() == [0, 1, 2]
+    assert read_artifact(path)[0]['factors']['users'].tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,52 @@
+"""
+The /feed candidate cache (cache.FeedCache): invalidation keeps feeds computed from a
+user's old history out, and a size-0 cache is disabled.
+"""
+from cache import FeedCache
+from metrics import Registry
+
+
+def cache(**kwargs):
+    return FeedCache(registry=Registry(), **kwargs)
+
+
+def test_feed_computed_before_an_invalidation_is_not_cached():
+    feeds = cache()
+    key = FeedCache.key(1, 'Happy ', '3', 'v1')
+    sequence = feeds.sequence
+    # A rating of user 1 is folded in while their feed is being computed
+    feeds.invalidate([1])
+    feeds.put(key, [10, 11], sequence)
+    assert feeds.get(key) is None
+
+    feeds.put(key, [10, 11], feeds.sequence)
+    assert feeds.get(FeedCache.key(1, 'happy', 3, 'v1')) == (10, 11)
+
+
+def test_other_users_invalidations_do_not_drop_a_feed():
+    feeds = cache()
+    key = FeedCache.key(1, None, None, 'v1')
+    sequence = feeds.sequence
+    feeds.invalidate([2])
+    feeds.put(key, [10], sequence)
+    assert feeds.get(key) == (10,)
+
+
+def test_clear_drops_feeds_in_flight():
+    feeds = cache()
+    key = FeedCache.key(1, None, None, 'v1')
+    sequence = feeds.sequence
+    feeds.clear()
+    feeds.put(key, [10], sequence)
+    assert len(feeds) == 0
+
+
+def test_size_zero_cache_is_disabled():
+    registry = Registry()
+    feeds = FeedCache(max_entries=0, registry=registry)
+    key = FeedCache.key(1, None, None, 'v1')
+    feeds.put(key, [10], feeds.sequence)
+    feeds.invalidate([1])
+    feeds.clear()
+    assert feeds.get(key) is None and len(feeds) == 0
+    assert not registry.counters
@@ -0,0 +1,87 @@
+"""
+The concurrent paginated fetcher (ingestion.client.Fetcher) against the local stub API:
+page order, retries with backoff on rate limiting and server errors, and giving up.
+"""
+import csv
+import time
+import types
+
+import pytest
+
+from ingestion import ENDPOINTS, ApiError, Fetcher, crawl
+from ingestion import client
+from ingestion.stub_server import StubApi
+
+SPEC = ENDPOINTS['viewed']
+
+
+def records(n):
+    return [
+        {'post_id': 1000 + i, 'user_id': i % 7 + 1, 'viewed_at': f'2024-01-01 00:00:{i % 60:02d}'}
+        for i in range(n)
+    ]
+
+
+def fetcher(api, page_size=10, workers=4, retries=3, backoff=0):
+    return Fetcher(api.url, token='', workers=workers, rate=None, page_size=page_size, retries=retries,
+                   backoff=backoff)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the fetcher slept for between attempts, without sleeping."""
+    delays = []
+    monkeypatch.setattr(client, 'time', types.SimpleNamespace(sleep=delays.append, monotonic=time.monotonic))
+    return delays
+
+
+def test_pages_arrive_in_order_and_crawl_completes(tmp_path):
+    listing = records(95)
+    with StubApi([(SPEC, listing)], latency=0.01) as api:
+        pages = list(fetcher(api).iter_pages(SPEC))
+        assert [page for page, _, _ in pages] == list(range(1, 11))
+        assert all(total_pages == 10 for _, _, total_pages in pages)
+        assert [item for _, items, _ in pages for item in items] == listing
+        assert api.requests == 10
+
+        path = str(tmp_path / SPEC.output)
+        assert crawl(fetcher(api), SPEC, path) == 95
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    assert [int(row['Post ID']) for row in rows] == [record['post_id'] for record in listing]
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_transient_errors_are_retried_with_backoff(sleeps, status):
+    listing = records(60)
+    # Every third request fails; each failed page succeeds on its next attempt
+    with StubApi([(SPEC, listing)], fail_every=3, fail_status=status) as api:
+        pages = list(fetcher(api, workers=1, backoff=0.5).iter_pages(SPEC))
+        assert [items for _, items, _ in pages] == [listing[i:i + 10] for i in range(0, 60, 10)]
+        assert api.requests == 6 + len(sleeps)
+    # Exponential backoff with jitter: the first retry waits between 1x and 2x `backoff`
+    assert sleeps and all(0.5 <= delay < 1.0 for delay in sleeps)
+
+
+def test_retry_after_is_honoured(sleeps):
+    with StubApi([(SPEC, records(5))], fail_every=2, fail_status=429, retry_after=7) as api:
+        fetcher(api, workers=1, backoff=0.5).get_page(SPEC, 1)
+        fetcher(api, workers=1, backoff=0.5).get_page(SPEC, 1)
+    assert sleeps == [7]
+
+
+def test_gives_up_after_the_last_retry(sleeps):
+    with StubApi([(SPEC, records(5))], fail_every=1) as api:
+        with pytest.raises(ApiError, match='after 4 attempts'):
+            fetcher(api, retries=3, backoff=0.5).get_page(SPEC, 1)
+        assert api.requests == 4
+    assert len(sleeps) == 3
+    assert all(0.5 * 2 ** attempt <= delay < 2 * 0.5 * 2 ** attempt for attempt, delay in enumerate(sleeps))
+
+
+def test_client_errors_are_not_retried(sleeps):
+    with StubApi([(SPEC, records(5))]) as api:
+        with pytest.raises(ApiError, match='status 404'):
+            fetcher(api).get_page(ENDPOINTS['liked'], 1)
+        assert api.requests == 1
+    assert sleeps == []
@@ -0,0 +1,44 @@
+"""
+Keyword parsing and similarity (indexes.parse_keywords, KeywordIndex): malformed
+post_summary_keywords values are skipped instead of failing the model build.
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from indexes import KeywordIndex, parse_keywords
+
+
+def keywords(*entries):
+    return json.dumps(list(entries))
+
+
+def test_weights_default_to_one():
+    assert parse_keywords(keywords({'keyword': ' Crypto ', 'weight': 3}, {'keyword': 'art'})) == [
+        ('crypto', 3.0), ('art', 1.0),
+    ]
+
+
+@pytest.mark.parametrize('weight', ['high', None, {'value': 2}, [1], 'NaN', 'inf'])
+def test_malformed_weights_are_skipped(weight):
+    text = keywords({'keyword': 'crypto', 'weight': weight}, {'keyword': 'art', 'weight': 2})
+    assert parse_keywords(text) == [('art', 2.0)]
+
+
+@pytest.mark.parametrize('text', [None, 3.5, '', 'not json', '{"keyword": "art"}', '[1, "art", {"weight": 2}]'])
+def test_malformed_values_give_no_pairs(text):
+    assert parse_keywords(text) == []
+
+
+def test_index_builds_around_malformed_weights():
+    posts = pd.DataFrame({
+        'Post ID': [1, 2, 3],
+        'post_summary_keywords': [
+            keywords({'keyword': 'crypto', 'weight': 'high'}, {'keyword': 'art', 'weight': 2}),
+            keywords({'keyword': 'art', 'weight': 5}),
+            keywords({'keyword': 'crypto', 'weight': None}),
+        ],
+    })
+    index = KeywordIndex(posts)
+    assert index.similar([1], 5) == [2]
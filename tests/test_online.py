@@ -0,0 +1,55 @@
+"""
+Live rating updates (online.OnlineUpdater, Recommender.update_ratings) on the shipped
+tables: the model a request already holds never changes underneath it.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import load_tables
+from neighbors import ExactNeighbors, IVFNeighbors
+from online import OnlineUpdater
+from recommender import Recommender
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return load_tables()
+
+
+def model(tables, neighbor_index, collaborative_mode):
+    return Recommender(tables['posts_summary'], tables['rated_posts'], {
+        'viewed': tables['viewed_posts'],
+        'liked': tables['liked_posts'],
+        'rated': tables['rated_posts'],
+        'inspired': tables['inspired_posts'],
+    }, tables['users_data'], neighbor_index=neighbor_index, collaborative_mode=collaborative_mode)
+
+
+@pytest.mark.parametrize('neighbor_index, collaborative_mode', [
+    (ExactNeighbors, 'factors'), (ExactNeighbors, 'neighbors'), (IVFNeighbors, 'neighbors'),
+])
+@pytest.mark.parametrize('new_user', [False, True])
+def test_update_leaves_the_serving_model_unchanged(tables, neighbor_index, collaborative_mode, new_user):
+    old = model(tables, neighbor_index, collaborative_mode)
+    user_id = int(old.user_encoder.ids[0])
+    old.collaborative(user_id)
+    vectors = np.array(old.svd_matrix)
+    index = None if old.neighbors is None else np.array(old.neighbors.vectors)
+    before = old.collaborative(user_id)
+
+    updater = OnlineUpdater(old, max_drift=1.0)
+    posts = old.post_encoder.ids[:20]
+    users = [user_id] * len(posts)
+    if new_user:
+        users[::2] = [int(old.user_encoder.ids.max()) + 1] * len(users[::2])
+    updated = updater.update(pd.DataFrame({'User ID': users, 'Post ID': posts, 'Rating Percent': 100}))
+
+    assert updater.recommender is not old
+    assert user_id in updated
+    np.testing.assert_array_equal(old.svd_matrix, vectors)
+    if index is not None:
+        np.testing.assert_array_equal(old.neighbors.vectors, index)
+    assert old.collaborative(user_id) == before
+    row = updater.recommender.user_encoder.encode([user_id])[0]
+    assert not np.array_equal(updater.recommender.svd_matrix[row], vectors[old.user_encoder.encode([user_id])[0]])
@@ -0,0 +1,35 @@
+"""
+The background model reloader (reloader.ModelReloader): at most one reload runs at a time.
+"""
+import threading
+
+from reloader import ModelReloader
+
+
+def test_concurrent_reload_requests_start_one_reload(tmp_path):
+    reloader = ModelReloader(updater=None, models_dir=str(tmp_path))
+    release, calls = threading.Event(), []
+    reloader.check = lambda: calls.append(1) or release.wait(10)
+
+    barrier = threading.Barrier(8)
+    started = []
+
+    def request():
+        barrier.wait()
+        started.append(reloader.reload_async())
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(started) == [False] * 7 + [True]
+    assert reloader.lock.locked()
+
+    # Once the reload finishes the lock is free for the next one
+    release.set()
+    with reloader.lock:
+        pass
+    assert reloader.reload_async()
+    with reloader.lock:
+        assert calls == [1, 1]
@@ -0,0 +1,91 @@
+"""
+Page-by-page CSV output (ingestion.sink.CsvSink, crawl) against the local stub API: an
+interrupted crawl resumes from its checkpoint without losing or repeating rows, and
+later pages with new keys widen the header.
+"""
+import csv
+import os
+
+import pytest
+
+from ingestion import ENDPOINTS, ApiError, Fetcher, crawl
+from ingestion.stub_server import StubApi
+
+SPEC = ENDPOINTS['viewed']
+SUMMARY = ENDPOINTS['summary']
+
+
+def records(n):
+    return [
+        {'post_id': 1000 + i, 'user_id': i % 7 + 1, 'viewed_at': f'2024-01-01 00:00:{i % 60:02d}'}
+        for i in range(n)
+    ]
+
+
+def fetcher(api, page_size=10, retries=3):
+    return Fetcher(api.url, token='', workers=1, rate=None, page_size=page_size, retries=retries, backoff=0)
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        return reader.fieldnames, list(reader)
+
+
+def test_interrupted_crawl_resumes_without_duplicates(tmp_path):
+    listing = records(100)
+    path = str(tmp_path / SPEC.output)
+    with StubApi([(SPEC, listing)], fail_every=5) as api:
+        # The fifth request fails with no retries left, after four pages were committed
+        with pytest.raises(ApiError):
+            crawl(fetcher(api, retries=0), SPEC, path)
+        assert not os.path.exists(path)
+        assert os.path.exists(path + '.checkpoint')
+
+        # A write cut short after the last checkpoint is dropped on resume
+        with open(path + '.partial', 'a', encoding='utf-8') as file:
+            file.write('1999,3,2024-01')
+        api.fail_every, api.requests = 0, 0
+        assert crawl(fetcher(api), SPEC, path) == 100
+        # Only the pages after the checkpoint were fetched again
+        assert api.requests == 6
+
+    header, rows = read_rows(path)
+    assert header == list(SPEC.fields)
+    assert [int(row['Post ID']) for row in rows] == [record['post_id'] for record in listing]
+    assert not os.path.exists(path + '.checkpoint') and not os.path.exists(path + '.partial')
+
+
+def test_checkpoint_with_another_page_size_starts_over(tmp_path):
+    listing = records(50)
+    path = str(tmp_path / SPEC.output)
+    with StubApi([(SPEC, listing)], fail_every=3) as api:
+        with pytest.raises(ApiError):
+            crawl(fetcher(api, retries=0), SPEC, path)
+        api.fail_every, api.requests = 0, 0
+        assert crawl(fetcher(api, page_size=7), SPEC, path) == 50
+        assert api.requests == 8
+    assert len(read_rows(path)[1]) == 50
+
+
+def test_new_keys_widen_the_header_across_a_resume(tmp_path):
+    # Page 2 brings a new key and page 3 a nested one, which is flattened
+    listing = (
+        [{'id': i, 'title': f'post {i}'} for i in range(10)]
+        + [{'id': i, 'title': f'post {i}', 'views': i * 10} for i in range(10, 20)]
+        + [{'id': i, 'title': f'post {i}', 'category': {'name': 'Vible'}} for i in range(20, 25)]
+    )
+    path = str(tmp_path / SUMMARY.output)
+    with StubApi([(SUMMARY, listing)], fail_every=3) as api:
+        # Interrupted after two pages, so the resumed run widens a header from its checkpoint
+        with pytest.raises(ApiError):
+            crawl(fetcher(api, retries=0), SUMMARY, path)
+        api.fail_every = 0
+        assert crawl(fetcher(api), SUMMARY, path) == 25
+
+    header, rows = read_rows(path)
+    assert header == ['category_name', 'id', 'title', 'views']
+    assert [int(row['id']) for row in rows] == list(range(25))
+    assert rows[0] == {'category_name': '', 'id': '0', 'title': 'post 0', 'views': ''}
+    assert rows[15]['views'] == '150'
+    assert rows[24]['category_name'] == 'Vible'
@@ -0,0 +1,113 @@
+"""
+Incremental sync (ingestion.sync) against the local stub API: every refresh must leave
+the same rows behind as a full crawl of the current listing.
+"""
+import os
+
+import pytest
+
+from ingestion import ENDPOINTS, ApiError, Fetcher, SyncState, crawl, sync
+from ingestion.stub_server import StubApi
+
+SPEC = ENDPOINTS['rated']
+
+
+def records(n, per_second=3):
+    """Rating records in ascending timestamp order, `per_second` of them sharing each timestamp."""
+    return [
+        {'post_id': 1000 + i, 'user_id': i % 7 + 1, 'rating_percent': i % 101,
+         'rated_at': f'2024-01-01 00:{i // per_second // 60:02d}:{i // per_second % 60:02d}'}
+        for i in range(n)
+    ]
+
+
+def fetcher(api, page_size, retries=3):
+    return Fetcher(api.url, token='', workers=1, rate=None, page_size=page_size, retries=retries, backoff=0)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+@pytest.fixture
+def api():
+    with StubApi([(SPEC, [])]) as api:
+        yield api
+
+
+def serve(api, listing):
+    api.fixtures[SPEC.path] = (SPEC, listing)
+
+
+def full_crawl(api, tmp_path, page_size=10):
+    path = str(tmp_path / 'full' / SPEC.output)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    crawl(fetcher(api, page_size), SPEC, path)
+    return read(path)
+
+
+def test_sync_after_partial_listing_matches_full_crawl(api, tmp_path):
+    listing = records(100)
+    path = str(tmp_path / SPEC.output)
+
+    # The seed ends in the middle of a group of records sharing a timestamp
+    serve(api, listing[:37])
+    assert sync(fetcher(api, 10), SPEC, path) == 37
+    serve(api, listing)
+    assert sync(fetcher(api, 10), SPEC, path) == 63
+    assert read(path) == full_crawl(api, tmp_path)
+
+    # Nothing new: a second sync adds no rows
+    assert sync(fetcher(api, 10), SPEC, path) == 0
+    assert read(path) == full_crawl(api, tmp_path)
+
+
+def test_interrupted_sync_resumes_with_another_page_size(api, tmp_path):
+    listing = records(120)
+    path = str(tmp_path / SPEC.output)
+    serve(api, listing[:30])
+    sync(fetcher(api, 10), SPEC, path)
+
+    # Fail the fourth request of the next sync, after three pages were committed
+    serve(api, listing)
+    api.requests, api.fail_every = 0, 4
+    with pytest.raises(ApiError):
+        sync(fetcher(api, 10, retries=0), SPEC, path)
+    api.fail_every = 0
+    committed = SyncState.load(path)
+    assert 30 < committed.offset < 120
+
+    # A write cut short after the last committed page is dropped on resume
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('1999,3,4')
+    assert sync(fetcher(api, 7), SPEC, path) == 120 - committed.offset
+    assert read(path) == full_crawl(api, tmp_path)
+
+
+def test_changed_listing_falls_back_to_full_crawl(api, tmp_path, capsys):
+    listing = records(60)
+    path = str(tmp_path / SPEC.output)
+    serve(api, listing[:40])
+    sync(fetcher(api, 10), SPEC, path)
+
+    # A record before the anchor was removed upstream, so offsets no longer line up
+    changed = listing[:5] + listing[6:]
+    serve(api, changed)
+    assert sync(fetcher(api, 10), SPEC, path) == len(changed)
+    assert 'crawling it in full' in capsys.readouterr().out
+    assert read(path) == full_crawl(api, tmp_path)
+    assert SyncState.load(path).offset == len(changed)
+
+
+def test_relisted_record_at_high_water_mark_is_dropped(api, tmp_path):
+    listing = records(30)
+    path = str(tmp_path / SPEC.output)
+    serve(api, listing[:20])
+    sync(fetcher(api, 10), SPEC, path)
+
+    # The last stored record is listed again at the same timestamp after the anchor
+    serve(api, listing[:20] + [listing[19]] + listing[20:])
+    assert sync(fetcher(api, 10), SPEC, path) == 10
+    serve(api, listing)
+    assert read(path) == full_crawl(api, tmp_path)
@@ -0,0 +1,53 @@
+import argparse
+import os
+import time
+
+from artifacts import MODELS_DIR, latest_version, publish
+from data import load_tables
+from recommender import Recommender
+
+
+def train(tables=None):
+    """Fit a Recommender on the source tables (loaded from disk when not given)."""
+    tables = tables or load_tables()
+    return Recommender(tables['posts_summary'], tables['rated_posts'], {
+        'viewed': tables['viewed_posts'],
+        'liked': tables['liked_posts'],
+        'rated': tables['rated_posts'],
+        'inspired': tables['inspired_posts'],
+    }, tables['users_data'])
+
+
+def save_model(recommender, models_dir=MODELS_DIR):
+    """Write the model to MODELS_DIR/<model version>/ and publish it as the latest."""
+    path = os.path.join(models_dir, recommender.model_version)
+    os.makedirs(models_dir, exist_ok=True)
+    recommender.save(path)
+    publish(models_dir, recommender.model_version)
+    return path
+
+
+def load_model(models_dir=MODELS_DIR, version=None):
+    """Load a saved model (the latest published one by default), or None if there is none."""
+    version = version or latest_version(models_dir)
+    if version is None:
+        return None
+    return Recommender.load(os.path.join(models_dir, version))
+
+
+def main():
+    """Train the recommender on the source tables and save it as a versioned model artifact."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--models-dir', default=MODELS_DIR, help='artifact root directory')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    recommender = train()
+    trained = time.perf_counter()
+    path = save_model(recommender, args.models_dir)
+    print(f"Trained model {recommender.model_version} in {trained - start:.2f}s, "
+          f"saved to {path} in {time.perf_counter() - trained:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
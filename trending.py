@@ -0,0 +1,190 @@
+import heapq
+import math
+import threading
+import time
+
+import numpy as np
+
+from data import INTERACTIONS
+from indexes import IdEncoder
+
+# Score of an event halves every HALF_LIFE seconds
+HALF_LIFE = 7 * 24 * 3600.0
+
+# Posts kept per category (and overall) in the top-N heaps
+TOP_N = 50
+
+# Weight of one interaction of each type
+EVENT_WEIGHTS = {'viewed': 1.0, 'liked': 3.0, 'rated': 2.0, 'inspired': 4.0}
+
+# Weight of each lifetime counter of posts_summary, credited at the post's creation time
+COUNTER_WEIGHTS = {'view_count': 1.0, 'upvote_count': 3.0, 'share_count': 4.0, 'rating_count': 2.0}
+
+# Largest decay exponent before the scores are rebased onto a later reference time
+MAX_EXPONENT = 500.0
+
+
+class TrendingIndex:
+    """
+    Time-decayed popularity of every post, with the top-N posts of each category kept in
+    heaps; a category's sorted list is cached until an event changes it.
+
+    An event of weight w at time t adds w * exp(decay * (t - reference_time)) to its
+    post's score ("forward decay"). Every score decays by the same factor as time passes,
+    so the ranking only changes when events arrive: recording an event touches one score
+    and two heaps (its category's and the overall one), never the full tables. Scores are
+    rebased onto a later reference time before the exponent grows large enough to
+    overflow.
+    """
+    def __init__(self, post_ids, categories, names, scores, reference_time, half_life=HALF_LIFE,
+                 top_n=TOP_N):
+        self.encoder = IdEncoder.from_arrays({'ids': np.asarray(post_ids, dtype=np.int64)})
+        # Category ID of each post, in encoder order, and category_name -> category_id
+        self.categories = np.asarray(categories, dtype=np.int64)
+        self.names = names
+        self.scores = np.array(scores, dtype=np.float64)
+        self.reference_time = float(reference_time)
+        self.half_life = half_life
+        self.decay = math.log(2) / half_life
+        self.top_n = top_n
+        self.lock = threading.Lock()
+        self._build_heaps()
+
+    def __getstate__(self):
+        # The lock cannot be pickled (e.g. to send a model to worker processes)
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, posts_summary, interaction_tables, half_life=HALF_LIFE, top_n=TOP_N):
+        """
+        Score the catalog from the lifetime counters of posts_summary and the timestamped
+        interaction tables ({kind: table}, as given to Recommender). Counters and tables
+        missing from the frames are skipped.
+        """
+        posts = posts_summary.drop_duplicates('Post ID').sort_values('Post ID')
+        post_ids = posts['Post ID'].to_numpy(dtype=np.int64)
+        names = dict(zip(posts['category_name'].astype(str), posts['category_id'].tolist()))
+
+        events = []
+        if 'created_at' in posts:
+            created = posts['created_at'].to_numpy(dtype=np.float64) / 1000
+            weights = sum(
+                posts[column].fillna(0).to_numpy(dtype=np.float64) * weight
+                for column, weight in COUNTER_WEIGHTS.items() if column in posts
+            )
+            events.append((post_ids, created, weights + np.zeros(len(posts))))
+        for kind, table in interaction_tables.items():
+            # Kinds are named after their tables: 'viewed' comes from viewed_posts
+            column = INTERACTIONS.get(f'{kind}_posts')
+            if column not in table:
+                continue
+            stamps = table[column].to_numpy().astype('datetime64[s]').astype(np.int64).astype(np.float64)
+            events.append((table['Post ID'].to_numpy(dtype=np.int64), stamps,
+                           np.full(len(table), EVENT_WEIGHTS[kind])))
+
+        stamps = np.concatenate([event[1] for event in events] or [[time.time()]])
+        index = cls(post_ids, posts['category_id'].to_numpy(), names, np.zeros(len(post_ids)),
+                    stamps.max(), half_life, top_n)
+        for event_posts, event_stamps, event_weights in events:
+            index._add(index.encoder.encode(event_posts), event_stamps, event_weights)
+        index._build_heaps()
+        return index
+
+    def _add(self, rows, stamps, weights):
+        known = rows >= 0
+        rows, stamps, weights = rows[known], stamps[known], weights[known]
+        if len(stamps) and self.decay * (stamps.max() - self.reference_time) > MAX_EXPONENT:
+            self._rebase(stamps.max())
+        np.add.at(self.scores, rows, weights * np.exp(self.decay * (stamps - self.reference_time)))
+        return rows
+
+    def _rebase(self, reference_time):
+        """Express every score relative to a later reference time; the ranking is unchanged."""
+        self.scores *= np.exp(-self.decay * (reference_time - self.reference_time))
+        self.reference_time = float(reference_time)
+        self._build_heaps()
+
+    def _build_heaps(self):
+        """
+        Rebuild every heap from the scores. A heap holds (score, row) entries; an entry is
+        current while `members[key][row]` equals its score, and stale ones are skipped.
+        """
+        self.members, self.heaps, self.ranked = {}, {}, {}
+        keys = [(None, np.arange(len(self.scores)))]
+        keys += [(key, np.flatnonzero(self.categories == key)) for key in np.unique(self.categories).tolist()]
+        for key, rows in keys:
+            if len(rows) > self.top_n:
+                rows = rows[np.argpartition(-self.scores[rows], self.top_n)[:self.top_n]]
+            self.members[key] = dict(zip(rows.tolist(), self.scores[rows].tolist()))
+            self.heaps[key] = [(score, row) for row, score in self.members[key].items()]
+            heapq.heapify(self.heaps[key])
+
+    def _push(self, key, row, score):
+        members, heap = self.members.setdefault(key, {}), self.heaps.setdefault(key, [])
+        if row not in members and len(members) >= self.top_n:
+            # Drop stale entries to find the current minimum, then replace it if beaten
+            while members.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            if score <= heap[0][0]:
+                return
+            del members[heapq.heappop(heap)[1]]
+        members[row] = score
+        self.ranked.pop(key, None)
+        heapq.heappush(heap, (score, row))
+        if len(heap) > 4 * self.top_n:
+            heap[:] = [(member_score, member) for member, member_score in members.items()]
+            heapq.heapify(heap)
+
+    def record(self, kind, post_ids, timestamps=None):
+        """
+        Add interaction events of type `kind` (see EVENT_WEIGHTS) for `post_ids`, at
+        `timestamps` in epoch seconds or now. Unknown posts are ignored.
+        """
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        stamps = np.full(len(post_ids), time.time()) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+        with self.lock:
+            rows = self._add(self.encoder.encode(post_ids), stamps, np.full(len(post_ids), EVENT_WEIGHTS[kind]))
+            for row in np.unique(rows).tolist():
+                score = self.scores[row]
+                self._push(None, row, score)
+                self._push(self.categories[row].item(), row, score)
+
+    def top(self, category_id=None, n=TOP_N):
+        """Post IDs of the `n` (at most top_n) highest scores in the category, or overall, best first."""
+        with self.lock:
+            # Sorted lists are cached until an event changes the category's members
+            ranked = self.ranked.get(category_id)
+            if ranked is None:
+                if category_id not in self.members:
+                    return []
+                members = self.members[category_id]
+                rows = np.asarray(sorted(members, key=members.get, reverse=True), dtype=np.int64)
+                ranked = self.ranked[category_id] = self.encoder.decode(rows).tolist()
+        return ranked[:n]
+
+    def category_id(self, name):
+        """Category ID of a category_name, or None when no post has it."""
+        return self.names.get(name)
+
+    def to_arrays(self):
+        return {
+            'ids': self.encoder.ids,
+            'categories': self.categories,
+            'scores': self.scores,
+            'names': np.asarray(list(self.names), dtype=str),
+            'name_ids': np.asarray(list(self.names.values()), dtype=np.int64),
+            'settings': np.asarray([self.reference_time, self.half_life, self.top_n], dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        reference_time, half_life, top_n = arrays['settings'].tolist()
+        names = dict(zip(arrays['names'].tolist(), arrays['name_ids'].tolist()))
+        return cls(arrays['ids'], arrays['categories'], names, arrays['scores'], reference_time, half_life,
+                   int(top_n))